@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+批量 WalkSAT (walksat.py --batch) 与逐个种子运行标量求解器的吞吐量对比:
+- 实例默认为固定种子的 grid 公式 (由 generatetseitin.ensure_instance 按需生成), 也可以用 --instance 指定
+- 标量: 与 run_seeds 相同, 通过 run_portfolio 依次运行 K 个种子 (默认 1 个 worker, 与批量模式一样只用一个核)
+- 批量: solve_batch 同步运行 K 条链, 活跃链少于 --handoff 条时把剩下的链交给标量求解器 (0 表示始终同步推进)
+两者的翻转上限都默认与求解器相同 (--max-flips 1000000), 因此比较的是求解完全部 K 个种子的总耗时;
+报告每种方式解出的种子数, 总翻转数, 总耗时与加速比 (标量耗时 / 批量耗时), 以及批量模式开始快于标量的最小 K.
+有种子未解出时, 两种方式的翻转数都被截断, 耗时不可直接比较.
+
+用法:
+    python3 batch_benchmark.py [--instance formula.cnf] [--chains 8,16,24,48,100,200] [--handoff 16]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'common'))
+sys.path.append(os.path.join(ROOT, 'generatecnf'))
+sys.path.append(os.path.join(ROOT, 'walksat'))
+
+from portfolio import run_portfolio
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+# 默认实例: grid 图族, 3600 个顶点
+DEFAULT_FAMILY, DEFAULT_N, DEFAULT_SEED = "grid", 3600, 1002
+DEFAULT_CHAINS = (8, 16, 24, 48, 100, 200)
+MAX_FLIPS = 1000000
+
+
+def scalar_seed(data, seed, should_stop):
+    """portfolio worker: 与 walksat.solve_seed 相同, 但带翻转上限."""
+    import walksat
+    path, formula, max_flips = data
+    solution, flip_count = walksat.solve_formula(formula, max_flips=max_flips, seed=seed, name=path,
+                                                 should_stop=should_stop)
+    return {"seed": seed, "solved": solution is not None, "flips": flip_count}
+
+
+def run_scalar(path, formula, chains, max_flips, workers):
+    start = time.time()
+    results = run_portfolio(scalar_seed, (path, formula, max_flips), range(chains), workers=workers, mode="all")
+    elapsed = time.time() - start
+    return {"flips": sum(r["flips"] for r in results), "solved": sum(r["solved"] for r in results), "time": elapsed}
+
+
+def run_batch(formula, chains, max_flips, handoff):
+    from batch_walksat import BatchFormula, solve_batch
+    batch = BatchFormula(formula)
+    start = time.time()
+    results = solve_batch(batch, chains, max_flips=max_flips, seed=0, handoff=handoff)
+    elapsed = time.time() - start
+    return {"flips": sum(r["flips"] for r in results), "solved": sum(r["solved"] for r in results), "time": elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare batched WalkSAT chains with scalar seeds run one by one.")
+    parser.add_argument("--instance", default=None,
+                        help=f"CNF file to solve (default: {DEFAULT_FAMILY}_{DEFAULT_N}_1 in the benchmark corpus)")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Directory for the generated default instance")
+    parser.add_argument("--chains", default=",".join(map(str, DEFAULT_CHAINS)),
+                        help="Comma-separated numbers of chains/seeds K to compare")
+    parser.add_argument("--max-flips", type=int, default=MAX_FLIPS,
+                        help="Flip limit per chain or seed (default: 1000000, the solver default)")
+    parser.add_argument("--handoff", type=int, default=None,
+                        help="Hand the remaining chains to the scalar solver below this many active chains "
+                             "(default: batch_walksat.HANDOFF_CHAINS; 0 keeps every chain in lockstep)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes for the scalar seeds (default: 1, the same single core as --batch)")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    import walksat
+    from batch_walksat import HANDOFF_CHAINS
+    handoff = HANDOFF_CHAINS if args.handoff is None else args.handoff
+    path = args.instance
+    if path is None:
+        import generatetseitin
+        path = generatetseitin.ensure_instance(DEFAULT_FAMILY, DEFAULT_N, 1, DEFAULT_SEED, root=args.corpus)
+    formula = walksat.read_dimacs(path)
+
+    rows = []
+    print("K\tscalar_solved\tbatch_solved\tscalar_time\tbatch_time\tspeedup")
+    for chains in (int(k) for k in args.chains.split(",") if k):
+        scalar = run_scalar(path, formula, chains, args.max_flips, args.workers)
+        batch = run_batch(formula, chains, args.max_flips, handoff)
+        row = {"chains": chains, "scalar": scalar, "batch": batch}
+        row["speedup"] = scalar["time"] / batch["time"] if batch["time"] > 0 else None
+        rows.append(row)
+        speedup = "-" if row["speedup"] is None else f"{row['speedup']:.2f}"
+        print(f"{chains}\t{scalar['solved']}\t{batch['solved']}\t{scalar['time']:.2f}\t{batch['time']:.2f}\t{speedup}")
+        if scalar["solved"] < chains or batch["solved"] < chains:
+            print(f"Warning: not every seed was solved within {args.max_flips} flips; the times are not comparable.",
+                  file=sys.stderr)
+
+    faster = [row["chains"] for row in rows if row["speedup"] and row["speedup"] > 1]
+    crossover = min(faster) if faster else None
+    print(f"batch faster from K={crossover}" if crossover is not None else "batch not faster for any K")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"instance": path, "max_flips": args.max_flips, "handoff": handoff, "rows": rows,
+                       "crossover": crossover}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+WalkSAT 与 DPLL 在 Tseitin 公式族上的可复现基准测试:
+- 固定语料: 每个图族 (tree, grid, regular, L_n) 有固定的基础种子, 实例由 generatetseitin.py 按任务种子生成,
+  已存在的文件直接复用 (生成是原子的, 中断后可续做)
+- 每个实例用固定的求解种子运行两个求解器 (同一进程内调用, 不计解释器启动时间);
+  两个求解器在固定种子下都是确定的, 因此 decisions / flips 与机器无关, 只有时间与吞吐量依赖机器
+- 报告: 每个 (solver, family, n) 的解出数, 时间与工作量中位数, 吞吐量 (flips/sec 或 decisions/sec),
+  每个 (solver, family) 的总吞吐量, 以及扩展曲线: log(工作量中位数) 对 log(n) 的最小二乘斜率
+- 与保存的基线比较: 解出数减少或工作量中位数增加超过容差 (逐行), 以及图族总吞吐量下降超过吞吐量容差时
+  标记为回归, 并以退出码 1 结束. 单行的运行时间太短, 吞吐量噪声大, 所以吞吐量按图族比较.
+  基线文件不在仓库中, 须先在本机用 --save-baseline 记录; 没有基线时报错退出, --no-compare 只输出报告
+
+用法:
+    python3 benchmark.py [--quick] [--output report.json] [--save-baseline | --no-compare] [--baseline baseline.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'common'))
+sys.path.append(os.path.join(ROOT, 'generatecnf'))
+sys.path.append(os.path.join(ROOT, 'walksat'))
+sys.path.append(os.path.join(ROOT, 'dpll'))
+
+from portfolio import quantile
+from results import append_records, make_record
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+BASELINE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 每个图族: 图大小, 每个大小的实例数, 固定的基础种子
+SUITE = {
+    "tree":    {"sizes": [20, 40, 80, 160], "instances": 3, "seed": 1001},
+    "grid":    {"sizes": [9, 16, 25, 36], "instances": 3, "seed": 1002},
+    "regular": {"sizes": [10, 14, 18, 22], "instances": 3, "seed": 1003},
+    "L_n":     {"sizes": [5, 6, 7], "instances": 2, "seed": 1004},
+}
+SOLVER_SEEDS = (0, 1, 2)
+WALKSAT_MAX_FLIPS = 200000
+DPLL_MAX_DECISIONS = 20000
+TOLERANCE = 0.10
+THROUGHPUT_TOLERANCE = 0.20
+MIN_MEASURE_TIME = 0.2  # 单次运行短于此时重复运行, 取最短时间
+MAX_REPEATS = 50
+
+
+def suite_config(quick=False):
+    """
+    --quick 时每个图族只取前两个大小, 每个大小一个实例.
+    """
+    if not quick:
+        return SUITE
+    return {family: dict(spec, sizes=spec["sizes"][:2], instances=1) for family, spec in SUITE.items()}
+
+
+def build_corpus(suite, corpus_dir):
+    """
+    生成 (或复用) 语料, 返回 [(family, n, path)]. 实例由 generatetseitin.ensure_instance 按需生成,
+    基础种子与每个实例的参数, 规模和内容哈希记录在语料目录的清单中.
+    """
+    import generatetseitin
+
+    instances = []
+    for family, spec in suite.items():
+        for n in spec["sizes"]:
+            for instance in range(1, spec["instances"] + 1):
+                path = generatetseitin.ensure_instance(family, n, instance, spec["seed"], root=corpus_dir)
+                instances.append((family, n, path))
+    return instances
+
+
+def run_walksat(path, seed):
+    import walksat
+    formula = walksat.read_dimacs(path)
+    options = {"max_flips": WALKSAT_MAX_FLIPS}
+    r = walksat.solve_seed((path, formula, 36000, options, None), seed, lambda: False)
+    return {"solved": r["solved"], "status": "SAT" if r["solved"] else "TIMEOUT", "work": r["flips"],
+            "time": r["time"]}
+
+
+def run_dpll(path, seed):
+    import dpll
+    cnf = dpll.parse_dimacs(path)
+    options = {"strategy": "none", "max_decisions": DPLL_MAX_DECISIONS}
+    with contextlib.redirect_stdout(io.StringIO()):
+        r = dpll.solve_seed((cnf, options, False), seed)
+    return {"solved": r["solved"], "status": r["status"], "work": r["decisions"], "time": r["time"]}
+
+
+def run_xor(path, seed):
+    # XOR 预处理单独作为一个"求解器": 与种子无关, 工作量为消元中的整行异或次数;
+    # 时间只计预处理 (stats["time"]), 不含读取公式, 与另两个求解器一致
+    import dimacs
+    import xorsat
+    result = xorsat.preprocess(dimacs.load_dimacs(path))
+    return {"solved": result.status is not None, "status": result.status or "UNKNOWN",
+            "work": result.stats["xor_ops"], "time": result.stats["time"]}
+
+
+SOLVERS = {"walksat": run_walksat, "dpll": run_dpll, "xor": run_xor}
+# 每个求解器在结果记录中的 (工作量字段, strategy)
+RECORD_FIELDS = {"walksat": ("flips", "random"), "dpll": ("decisions", "none"), "xor": ("xor_ops", "gauss")}
+
+
+def fit_exponent(points):
+    """
+    对 [(n, work)] 做 log(work) = a + b*log(n) 的最小二乘拟合, 返回 b; 点数不足两个时返回 None.
+    """
+    points = [(math.log(n), math.log(work)) for n, work in points if n > 0 and work > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    var_x = sum((x - mean_x) ** 2 for x, _ in points)
+    if var_x == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x
+
+
+def run_suite(suite, corpus_dir, solvers, results_path=None):
+    instances = build_corpus(suite, corpus_dir)
+    runs = {}
+    for solver in solvers:
+        for family, n, path in instances:
+            for seed in SOLVER_SEEDS:
+                r = SOLVERS[solver](path, seed)
+                # 固定种子下工作量不变, 短的运行重复若干次取最短时间以降低吞吐量的噪声
+                elapsed, repeats = r["time"], 1
+                while elapsed < MIN_MEASURE_TIME and repeats < MAX_REPEATS:
+                    t = SOLVERS[solver](path, seed)["time"]
+                    r["time"] = min(r["time"], t)
+                    elapsed += t
+                    repeats += 1
+                runs.setdefault((solver, family, n), []).append(r)
+                if results_path:
+                    work_key, strategy = RECORD_FIELDS[solver]
+                    append_records(results_path, [make_record(path, solver, strategy, seed, r["status"], r["time"],
+                                                              **{work_key: r["work"]})])
+            print(f"{solver} {family} done", file=sys.stderr)
+
+    rows = []
+    for (solver, family, n), group in sorted(runs.items(), key=lambda item: (item[0][0], item[0][1], item[0][2])):
+        solved = [r for r in group if r["solved"]]
+        total_time = sum(r["time"] for r in group)
+        rows.append({
+            "solver": solver,
+            "family": family,
+            "n": n,
+            "runs": len(group),
+            "solved": len(solved),
+            "time_median": quantile([r["time"] for r in solved], 0.5) if solved else None,
+            "work_median": quantile([r["work"] for r in solved], 0.5) if solved else None,
+            "throughput": sum(r["work"] for r in group) / total_time if total_time > 0 else None,
+        })
+
+    throughput = {}
+    for (solver, family, n), group in runs.items():
+        totals = throughput.setdefault(f"{solver}/{family}", [0, 0.0])
+        totals[0] += sum(r["work"] for r in group)
+        totals[1] += sum(r["time"] for r in group)
+    throughput = {key: work / seconds if seconds > 0 else None for key, (work, seconds) in sorted(throughput.items())}
+
+    scaling = {}
+    for row in rows:
+        if row["work_median"] is not None:
+            scaling.setdefault(f"{row['solver']}/{row['family']}", []).append((row["n"], row["work_median"]))
+    scaling = {key: {"points": points, "exponent": fit_exponent(points)} for key, points in scaling.items()}
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "suite": suite,
+            "solver_seeds": list(SOLVER_SEEDS),
+            "walksat_max_flips": WALKSAT_MAX_FLIPS,
+            "dpll_max_decisions": DPLL_MAX_DECISIONS,
+        },
+        "rows": rows,
+        "throughput": throughput,
+        "scaling": scaling,
+    }
+
+
+def default_baseline(quick):
+    return os.path.join(BASELINE_DIR, "baseline-quick.json" if quick else "baseline.json")
+
+
+def compare(report, baseline, tolerance=TOLERANCE, throughput_tolerance=THROUGHPUT_TOLERANCE):
+    """
+    与基线逐行比较, 返回问题列表 (字符串). 工作量在固定种子下是确定的, 任何变化都说明求解行为变了.
+    语料或求解上限与基线不同时无法比较, 抛出 ValueError.
+    """
+    for key in ("suite", "solver_seeds", "walksat_max_flips", "dpll_max_decisions"):
+        if json.loads(json.dumps(report["meta"][key])) != baseline["meta"][key]:
+            raise ValueError(f"baseline was recorded with a different {key}")
+    base_rows = {(r["solver"], r["family"], r["n"]): r for r in baseline["rows"]}
+    problems = []
+    for row in report["rows"]:
+        key = (row["solver"], row["family"], row["n"])
+        base = base_rows.get(key)
+        if base is None:
+            continue
+        name = "/".join(map(str, key))
+        if row["solved"] < base["solved"]:
+            problems.append(f"{name}: solved {row['solved']} < baseline {base['solved']}")
+        if row["work_median"] is not None and base["work_median"] is not None \
+                and row["work_median"] > base["work_median"] * (1 + tolerance):
+            problems.append(f"{name}: median work {row['work_median']:g} > baseline {base['work_median']:g}")
+    for key, value in report["throughput"].items():
+        base = baseline["throughput"].get(key)
+        if value is not None and base and value < base * (1 - throughput_tolerance):
+            problems.append(f"{key}: throughput {value:.0f}/s < baseline {base:.0f}/s")
+    return problems
+
+
+def print_report(report):
+    print("solver\tfamily\tn\tsolved\ttime_median\twork_median\tthroughput")
+    for row in report["rows"]:
+        cells = [row["solver"], row["family"], row["n"], f"{row['solved']}/{row['runs']}"]
+        for key in ("time_median", "work_median", "throughput"):
+            value = row[key]
+            cells.append("-" if value is None else f"{value:.4g}")
+        print("\t".join(map(str, cells)))
+    for key, value in report["throughput"].items():
+        print(f"throughput {key}: {value:.0f}/s" if value is not None else f"throughput {key}: -")
+    for key, curve in sorted(report["scaling"].items()):
+        exponent = curve["exponent"]
+        print(f"scaling {key}: work ~ n^{exponent:.2f}" if exponent is not None else f"scaling {key}: -")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark WalkSAT vs DPLL on pinned Tseitin families.")
+    parser.add_argument("--quick", action="store_true", help="Two sizes per family, one instance per size")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Directory for the generated corpus")
+    parser.add_argument("--solvers", default="walksat,dpll",
+                        help="Comma-separated solvers to run: walksat, dpll, xor (default: walksat,dpll)")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file")
+    parser.add_argument("--results", default=None, help="Also append every run to this JSONL results file")
+    parser.add_argument("--baseline", default=None,
+                        help="Baseline report to compare against (default: baseline.json, or baseline-quick.json with --quick)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this report as the new baseline")
+    parser.add_argument("--no-compare", action="store_true", help="Only print/write the report, without a baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="Relative slack before a median-work increase is a regression (default: 0.10)")
+    parser.add_argument("--throughput-tolerance", type=float, default=THROUGHPUT_TOLERANCE,
+                        help="Relative slack before a per-family throughput drop is a regression (default: 0.20)")
+    args = parser.parse_args()
+
+    solvers = [s for s in args.solvers.split(",") if s]
+    for solver in solvers:
+        if solver not in SOLVERS:
+            parser.error(f"Unknown solver: {solver}")
+
+    baseline_path = args.baseline or default_baseline(args.quick)
+    compare_baseline = not args.save_baseline and not args.no_compare
+    # 基线不随仓库提交; 先检查, 不必跑完整个基准才发现无法比较
+    if compare_baseline and not os.path.exists(baseline_path):
+        rerun = " --quick" if args.quick else ""
+        if args.baseline:
+            rerun += f" --baseline {args.baseline}"
+        sys.exit(f"No baseline at {baseline_path}: run `benchmark.py{rerun} --save-baseline` first "
+                 "(or pass --no-compare for a report only)")
+    report = run_suite(suite_config(args.quick), args.corpus, solvers, results_path=args.results)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(baseline_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {baseline_path}")
+        return
+    if not compare_baseline:
+        return
+    with open(baseline_path) as f:
+        try:
+            problems = compare(report, json.load(f), args.tolerance, args.throughput_tolerance)
+        except ValueError as e:
+            sys.exit(f"Cannot compare with {baseline_path}: {e}")
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    if problems:
+        sys.exit(1)
+    print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
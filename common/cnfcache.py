@@ -0,0 +1,181 @@
+"""
+CNF 公式的二进制缓存格式, 缓存文件与源文件放在一起 (<file>.cnf.cnfb):
+
+    头部  struct HEADER_FORMAT (见下)
+    offsets      int64 * (num_clauses + 1)
+    literals     int32 * num_literals
+    occ_offsets  int64 * (2 * num_variables + 3)
+    occ_clauses  int32 * num_literals
+每一段都按 8 字节对齐. 读取时整个文件 mmap, 各段直接以 memoryview 交给 CNFFormula, 不做拷贝.
+
+缓存以源文件的 (mtime, size) 作为快速校验; 两者不一致时再比较源文件的 SHA-256,
+内容未变 (例如文件被复制或 touch) 仍然可以使用缓存, 并把新的 (mtime, size) 写回头部.
+
+文件不存在但位于 generatetseitin.py 的语料目录中 (<root>/<graph_type>/corpus.json 记录了基础种子) 时,
+load_formula 先按需生成该实例, 求解器与基准测试因此只为实际求解的规模付生成代价.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from dimacs import CNFFormula, load_dimacs
+
+MAGIC = b'CNFB'
+VERSION = 1
+CACHE_SUFFIX = '.cnfb'
+# magic, version, num_variables, max_variable, num_clauses, num_literals, 源文件 mtime_ns, 源文件大小, 源文件 SHA-256
+HEADER_FORMAT = '<4sIqqqqqq32s'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+STAT_OFFSET = struct.calcsize('<4sIqqqq')  # 头部中源文件 mtime_ns 与大小的位置
+
+
+def cache_path(filename):
+    return filename + CACHE_SUFFIX
+
+
+def file_digest(filename):
+    h = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.digest()
+
+
+def _align(n):
+    return (n + 7) & ~7
+
+
+def write_cache(formula, filename, st, digest):
+    """
+    将 formula 写成 filename 对应的缓存文件 (先写临时文件再改名, 并发写入安全).
+    st 与 digest 为解析之前取得的源文件 os.stat 结果与 SHA-256, 与 formula 对应的正是这一版本的内容;
+    解析之后再取会把解析期间被改写的新内容记为缓存的来源.
+    """
+    occ_offsets, occ_clauses = formula.occurrences()
+    sections = [
+        array('q', formula.offsets),
+        array('i', formula.literals),
+        array('q', occ_offsets),
+        array('i', occ_clauses),
+    ]
+    header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, formula.num_variables, formula.max_variable,
+                         len(formula), len(formula.literals), st.st_mtime_ns, st.st_size, digest)
+    target = cache_path(filename)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(header)
+        f.write(bytes(_align(HEADER_SIZE) - HEADER_SIZE))
+        for section in sections:
+            data = section.tobytes()
+            f.write(data)
+            f.write(bytes(_align(len(data)) - len(data)))
+    os.replace(tmp, target)
+
+
+def _refresh_stat(target, st):
+    """
+    源文件内容未变但 (mtime, size) 变了 (touch, checkout): 原地改写缓存头部的这两个字段,
+    之后的读取重新走快速校验, 不再每次计算整个源文件的 SHA-256. 缓存不可写时跳过.
+    """
+    try:
+        fd = os.open(target, os.O_WRONLY)
+    except OSError:
+        return
+    try:
+        os.pwrite(fd, struct.pack('<qq', st.st_mtime_ns, st.st_size), STAT_OFFSET)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def read_cache(filename):
+    """
+    读取 filename 的缓存并以 mmap 零拷贝构造 CNFFormula; 缓存不存在或已过期时返回 None.
+    """
+    target = cache_path(filename)
+    try:
+        with open(target, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        if len(mm) < HEADER_SIZE:
+            mm.close()
+            return None
+        (magic, version, num_variables, max_variable, num_clauses, num_literals,
+         mtime_ns, size, digest) = struct.unpack_from(HEADER_FORMAT, mm)
+        if magic != MAGIC or version != VERSION:
+            mm.close()
+            return None
+        # 各段 (类型, 起始位置, 字节数); 文件被截断 (例如写入中途断电) 时改为重新解析, 而不是越界读出错的数据
+        layout = []
+        pos = _align(HEADER_SIZE)
+        for typecode, count in (('q', num_clauses + 1), ('i', num_literals),
+                                ('q', 2 * num_variables + 3), ('i', num_literals)):
+            nbytes = count * struct.calcsize(typecode)
+            if nbytes < 0 or len(mm) < pos + nbytes:
+                mm.close()
+                return None
+            layout.append((typecode, pos, nbytes))
+            pos = _align(pos + nbytes)
+        st = os.stat(filename)
+        if (st.st_mtime_ns, st.st_size) != (mtime_ns, size):
+            if file_digest(filename) != digest:
+                mm.close()
+                return None
+            _refresh_stat(target, st)
+    except BaseException:
+        mm.close()
+        raise
+
+    view = memoryview(mm)
+    offsets, literals, occ_offsets, occ_clauses = [view[pos:pos + nbytes].cast(typecode)
+                                                   for typecode, pos, nbytes in layout]
+
+    formula = CNFFormula(literals, offsets, num_variables=num_variables, max_variable=max_variable)
+    formula._occurrences = (occ_offsets, occ_clauses)
+    formula._mmap = mm  # 保持映射有效
+    return formula
+
+
+def ensure_generated(filename):
+    """
+    filename 不存在且所在目录是生成语料的图类型目录时, 调用 generatetseitin.ensure_path 生成它.
+    """
+    if os.path.exists(filename) or not os.path.exists(os.path.join(os.path.dirname(filename) or '.', 'corpus.json')):
+        return
+    generator_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'generatecnf')
+    if generator_dir not in sys.path:
+        sys.path.append(generator_dir)
+    import generatetseitin
+    generatetseitin.ensure_path(filename)
+
+
+def load_formula(filename, use_cache=True, use_mmap=None):
+    """
+    优先读取二进制缓存; 否则解析 DIMACS 文本并写入缓存 (目录不可写时跳过).
+    use_cache=False 时直接解析文本, 不读也不写缓存. 语料中尚未生成的实例先按需生成 (见 ensure_generated).
+    """
+    ensure_generated(filename)
+    if not use_cache:
+        return load_dimacs(filename, use_mmap=use_mmap)
+    formula = read_cache(filename)
+    if formula is not None:
+        return formula
+    # 先记下源文件的 (mtime, size) 与摘要再解析; 解析期间文件被改写时解析结果可能混合新旧内容, 不写缓存
+    st = os.stat(filename)
+    digest = file_digest(filename)
+    formula = load_dimacs(filename, use_mmap=use_mmap)
+    after = os.stat(filename)
+    if (after.st_mtime_ns, after.st_size) != (st.st_mtime_ns, st.st_size):
+        return formula
+    try:
+        write_cache(formula, filename, st, digest)
+    except OSError:
+        pass
+    return formula
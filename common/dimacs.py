@@ -0,0 +1,268 @@
+"""
+walksat.py 与 dpll.py 共用的 DIMACS 读取器.
+
+子句以扁平数组存储, 而不是 Python 的列表嵌套列表:
+- literals: array('i'), 所有子句的文字首尾相接 (不含结尾的 0)
+- offsets:  array('q'), 长度为 子句数+1, 第 i 个子句为 literals[offsets[i]:offsets[i+1]]
+
+文件按 DIMACS 标准视为以 0 结尾的文字流, 因此子句可以跨行; 文件末尾缺少 0 的最后一个子句同样保留.
+读取按块进行, 峰值内存与文件大小无关; 大文件可通过 mmap 读取, 不经过 Python 的文件缓冲.
+若安装了 NumPy, 解析整数, 切分子句与建立出现位置索引都使用向量化实现, 不为每个文字创建 Python 对象.
+以 .gz 结尾的文件按 gzip 流式解压读取.
+"""
+
+import gzip
+import mmap
+import os
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 可选
+    np = None
+
+CHUNK_SIZE = 1 << 20          # 每次解析 1MB 文本
+MMAP_THRESHOLD = 1 << 28      # 超过 256MB 的文件默认用 mmap 读取
+
+
+class CNFFormula:
+    """
+    紧凑存储的 CNF 公式.
+    - num_variables: 头部声明的变量数与实际出现的最大变量编号中的较大者
+    - max_variable:  实际出现的最大变量编号
+    literals / offsets 可以是 array, 也可以是 memoryview (例如从 mmap 零拷贝得到).
+    """
+    def __init__(self, literals, offsets, num_variables=0, max_variable=None):
+        self.literals = literals
+        self.offsets = offsets
+        if max_variable is None:
+            max_variable = max((abs(lit) for lit in literals), default=0)
+        self.max_variable = max_variable
+        self.num_variables = max(num_variables, max_variable)
+        self._occurrences = None
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getstate__(self):
+        # memoryview (mmap) 无法 pickle, 传给其他进程时转为 array
+        state = dict(self.__dict__)
+        state.pop('_mmap', None)
+        state['literals'] = _as_array('i', self.literals)
+        state['offsets'] = _as_array('q', self.offsets)
+        if self._occurrences is not None:
+            occ_offsets, occ_clauses = self._occurrences
+            state['_occurrences'] = (_as_array('q', occ_offsets), _as_array('i', occ_clauses))
+        return state
+
+    def clause(self, idx):
+        return self.literals[self.offsets[idx]:self.offsets[idx + 1]]
+
+    def clauses(self):
+        """
+        逐个产生子句 (list), 用于需要列表形式的旧代码.
+        """
+        literals = self.literals
+        offsets = self.offsets
+        for idx in range(len(offsets) - 1):
+            yield list(literals[offsets[idx]:offsets[idx + 1]])
+
+    def occurrences(self):
+        """
+        文字 -> 子句 的出现位置索引 (CSR 形式), 按子句编号递增, 同一子句中重复的文字重复记录.
+        文字 lit 的下标为 literal_index(lit); 含 lit 的子句为 occ_clauses[occ_offsets[k]:occ_offsets[k+1]].
+        结果会被缓存.
+        """
+        if self._occurrences is None:
+            self._occurrences = _build_occurrences(self.literals, self.offsets, self.num_variables)
+        return self._occurrences
+
+
+def _as_array(typecode, values):
+    if isinstance(values, array):
+        return values
+    result = array(typecode)
+    result.frombytes(memoryview(values).cast('B'))
+    return result
+
+
+def literal_index(lit):
+    """
+    文字在出现位置索引中的下标: +v -> 2v, -v -> 2v+1.
+    """
+    return 2 * lit if lit > 0 else -2 * lit + 1
+
+
+def _build_occurrences(literals, offsets, num_variables):
+    size = 2 * num_variables + 2
+    if np is not None and len(literals):
+        lits = np.asarray(literals, dtype=np.int64)
+        lengths = np.diff(np.asarray(offsets, dtype=np.int64))
+        num_clauses = len(lengths)
+        keys = np.where(lits > 0, 2 * lits, -2 * lits + 1)
+        counts = np.bincount(keys, minlength=size)
+        # 把 (文字下标, 子句编号) 编码成一个 int64 排序: 编码互不相同, 不需要稳定排序, 结果同样按子句编号递增
+        keys *= num_clauses
+        keys += np.repeat(np.arange(num_clauses, dtype=np.int64), lengths)
+        keys.sort()
+        keys %= num_clauses
+        occ_offsets = array('q', np.concatenate(([0], np.cumsum(counts))).tobytes())
+        occ_clauses = array('i', keys.astype(np.int32).tobytes())
+        return occ_offsets, occ_clauses
+
+    counts = [0] * (size + 1)
+    for lit in literals:
+        counts[literal_index(lit) + 1] += 1
+    for k in range(1, size + 1):
+        counts[k] += counts[k - 1]
+    occ_offsets = array('q', counts)
+    fill = counts[:-1]
+    occ_clauses = array('i', bytes(4 * len(literals)))
+    for idx in range(len(offsets) - 1):
+        for pos in range(offsets[idx], offsets[idx + 1]):
+            k = literal_index(literals[pos])
+            occ_clauses[fill[k]] = idx
+            fill[k] += 1
+    return occ_offsets, occ_clauses
+
+
+def _iter_chunks(filename, use_mmap):
+    """
+    按块产生文件内容, 每块都在行尾处截断.
+    """
+    opener = gzip.open if filename.endswith('.gz') else open
+    with opener(filename, 'rb') as f:
+        if use_mmap and os.fstat(f.fileno()).st_size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                size = len(mm)
+                start = 0
+                while start < size:
+                    end = mm.find(b'\n', min(start + CHUNK_SIZE, size))
+                    end = size if end == -1 else end + 1
+                    yield mm[start:end]
+                    start = end
+            return
+        rest = b''
+        while True:
+            block = f.read(CHUNK_SIZE)
+            if not block:
+                break
+            block = rest + block
+            cut = block.rfind(b'\n') + 1
+            if cut == 0:
+                rest = block
+                continue
+            rest = block[cut:]
+            yield block[:cut]
+        if rest:
+            yield rest
+
+
+_POW10 = 10 ** np.arange(9, dtype=np.int32) if np is not None else None
+
+
+def _parse_ints(text):
+    """
+    把空白分隔的十进制整数文本向量化地解析为 int32 数组 (每个 token 至多 9 位), 不为每个 token 创建 Python 对象:
+    找出数字串的起止位置, 每个数字乘以 10 的 (到串尾的距离) 次幂后按串求和, 前面紧挨 '-' 的取负.
+    与 int() 一致, 每个 token 为可选的 '+' 或 '-' 加数字串: 符号只能出现在文本开头或空白之后, 且后面必须是数字,
+    因此 "5-3", "--5" 与单独的 "-" 都会报错, 而不是被拆成几个整数.
+    """
+    buf = np.frombuffer(text, dtype=np.uint8)
+    digits = buf - np.uint8(ord('0'))
+    is_digit = digits < 10
+    minus = buf == ord('-')
+    sign = minus | (buf == ord('+'))
+    space = buf <= ord(' ')
+    if (np.any(~(is_digit | sign | space)) or (len(buf) and sign[-1])
+            or np.any(sign[1:] & ~space[:-1]) or np.any(sign[:-1] & ~is_digit[1:])):
+        raise ValueError(f"invalid DIMACS token in {bytes(text[:80])!r}")
+    bounds = np.flatnonzero(np.diff(is_digit.view(np.int8), prepend=np.int8(0), append=np.int8(0)))
+    starts = bounds[0::2]
+    lengths = bounds[1::2] - starts
+    if not len(starts):
+        return np.zeros(0, dtype=np.int32)
+    if lengths.max() > len(_POW10):
+        raise ValueError(f"DIMACS literal out of range in {bytes(text[:80])!r}")
+    lengths = lengths.astype(np.int32)
+    ends = np.cumsum(lengths, dtype=np.int32)
+    powers = np.repeat(ends, lengths)
+    powers -= np.arange(1, ends[-1] + 1, dtype=np.int32)
+    terms = _POW10[powers]
+    del powers
+    terms *= digits[is_digit]
+    values = np.add.reduceat(terms, ends - lengths, dtype=np.int32)
+    values[minus[starts - 1]] *= -1  # starts[0] == 0 时取到 minus[-1], 上面已保证末字符不是符号
+    return values
+
+
+def _body_text(chunk, header):
+    """
+    去掉注释行 (c), 头部 (p) 与 SATLIB 风格的结束标记 (%) 之后剩下的文本.
+    返回 (text, 是否遇到 %).
+    """
+    if b'c' not in chunk and b'p' not in chunk and b'%' not in chunk:
+        return chunk, False
+    body = []
+    for line in chunk.splitlines():
+        stripped = line.lstrip()
+        if not stripped:
+            continue
+        first = stripped[:1]
+        if first == b'c':
+            continue
+        if first == b'p':
+            parts = stripped.split()
+            if len(parts) >= 3:
+                header[0] = int(parts[2])
+            continue
+        if first == b'%':
+            return b' '.join(body), True
+        body.append(stripped)
+    return b' '.join(body), False
+
+
+def load_dimacs(filename, use_mmap=None):
+    """
+    读取 DIMACS CNF 文件, 返回 CNFFormula.
+    use_mmap 为 None 时, 超过 MMAP_THRESHOLD 的文件自动使用 mmap.
+    """
+    if filename.endswith('.gz'):
+        use_mmap = False
+    elif use_mmap is None:
+        use_mmap = os.path.getsize(filename) > MMAP_THRESHOLD
+
+    header = [0]  # 头部声明的变量数
+    literals = array('i')
+    offsets = array('q', [0])
+    max_variable = 0
+
+    for chunk in _iter_chunks(filename, use_mmap):
+        text, finished = _body_text(chunk, header)
+        if text.strip():
+            base = len(literals)
+            if np is not None:
+                values = _parse_ints(text)
+                zeros = np.flatnonzero(values == 0)
+                nonzero = values[values != 0]
+                if len(nonzero):
+                    max_variable = max(max_variable, int(np.abs(nonzero).max()))
+                literals.frombytes(nonzero.tobytes())
+                # 第 k 个 0 之前有 zeros[k]-k 个文字
+                ends = zeros - np.arange(len(zeros)) + base
+                offsets.frombytes(ends.astype(np.int64).tobytes())
+            else:
+                for lit in map(int, text.split()):
+                    if lit == 0:
+                        offsets.append(len(literals))
+                    else:
+                        literals.append(lit)
+                        if abs(lit) > max_variable:
+                            max_variable = abs(lit)
+        if finished:
+            break
+
+    # 最后一个子句缺少结尾的 0
+    if len(literals) > offsets[-1]:
+        offsets.append(len(literals))
+    return CNFFormula(literals, offsets, num_variables=header[0], max_variable=max_variable)
@@ -0,0 +1,79 @@
+"""
+多种子并行求解 (portfolio), 供 walksat.py 与 dpll.py 共用:
+- 公式只在父进程中解析一次, 通过进程池的 initializer 交给各 worker (fork 时直接共享内存页)
+- mode="first": 任一种子找到解后设置共享的停止标志并取消尚未开始的任务,
+  正在运行的 worker 轮询 should_stop() 后尽快返回
+- mode="all":   运行全部种子, 收集完整的运行时间分布
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+_worker_solve = None
+_worker_data = None
+_worker_stop = None
+
+
+def _init_worker(solve_fn, data, stop_event):
+    global _worker_solve, _worker_data, _worker_stop
+    _worker_solve = solve_fn
+    _worker_data = data
+    _worker_stop = stop_event
+
+
+def _run_seed(seed):
+    return _worker_solve(_worker_data, seed, _worker_stop.is_set)
+
+
+def run_portfolio(solve_fn, data, seeds, workers=None, mode="first"):
+    """
+    在进程池中对每个种子调用 solve_fn(data, seed, should_stop).
+    solve_fn 必须是模块级函数, 返回包含 "seed" 与 "solved" 键的字典.
+    返回已完成任务的结果列表 (按完成顺序); mode="first" 时被取消的种子不在其中.
+    """
+    if mode not in ("first", "all"):
+        raise ValueError(f"Unknown portfolio mode: {mode}")
+
+    stop_event = multiprocessing.Event()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(solve_fn, data, stop_event)) as executor:
+        futures = [executor.submit(_run_seed, seed) for seed in seeds]
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+            result = future.result()
+            results.append(result)
+            if mode == "first" and result["solved"]:
+                stop_event.set()
+                for f in futures:
+                    f.cancel()
+                break
+    return results
+
+
+def quantile(values, q):
+    """
+    线性插值分位数, values 需非空.
+    """
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def summarize(results, key):
+    """
+    对结果中某一字段 (如 time / flips / decisions) 给出最小值, 四分位数与最大值.
+    """
+    values = [r[key] for r in results]
+    if not values:
+        return {}
+    return {
+        "min": min(values),
+        "q25": quantile(values, 0.25),
+        "median": quantile(values, 0.5),
+        "q75": quantile(values, 0.75),
+        "max": max(values),
+    }
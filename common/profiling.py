@@ -0,0 +1,77 @@
+"""
+可选的运行剖析, 供 walksat.py 与 dpll.py 共用:
+- 分阶段计时: timed(phase, fn) 返回计时包装后的 fn, 同时统计调用次数 (计时为包含式, 嵌套阶段的时间会重复计入)
+- 计数器: count / maximum
+- 轨迹采样: record(name, point), 例如 WalkSAT 每隔 sample_interval 次翻转记录一次未满足子句数
+- report() 汇总为字典, write_report() 以 JSON 写入文件或标准输出
+
+未开启剖析时求解器持有 profiler=None, 热路径上除了一次 None 判断外没有额外开销;
+开启时才把被测方法替换为计时包装.
+"""
+
+import json
+import sys
+import time
+
+
+class Profiler:
+    def __init__(self, sample_interval=1000):
+        self.sample_interval = sample_interval
+        self.timers = {}
+        self.counters = {}
+        self.series = {}
+        self.start_time = time.perf_counter()
+
+    def timed(self, phase, fn):
+        timers = self.timers
+        counters = self.counters
+        timers.setdefault(phase, 0.0)
+        calls = f"{phase}_calls"
+        counters.setdefault(calls, 0)
+        perf_counter = time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                timers[phase] += perf_counter() - start
+                counters[calls] += 1
+        return wrapper
+
+    def add_time(self, phase, seconds):
+        self.timers[phase] = self.timers.get(phase, 0.0) + seconds
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def maximum(self, name, value):
+        if value > self.counters.get(name, value - 1):
+            self.counters[name] = value
+
+    def record(self, name, point):
+        self.series.setdefault(name, []).append(point)
+
+    def report(self, **fields):
+        """
+        汇总为可直接 JSON 序列化的字典; fields 为求解器附加的字段 (如 solver, seed, status).
+        """
+        result = dict(fields)
+        result["wall_time"] = time.perf_counter() - self.start_time
+        result["timers"] = dict(self.timers)
+        result["counters"] = dict(self.counters)
+        result["series"] = {name: list(points) for name, points in self.series.items()}
+        return result
+
+
+def write_report(report, path):
+    """
+    将 report (字典或字典列表) 以 JSON 写入 path; path 为 "-" 时写到标准输出.
+    """
+    if path == "-":
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
@@ -0,0 +1,169 @@
+"""
+结构化的实验结果, 供 walksat.py 与 dpll.py 共用:
+- 每次求解 (一个文件的一个种子) 是 JSONL 结果文件中的一行记录, 多个进程可以同时追加同一个文件:
+  整批记录用一次 O_APPEND 写入, 并在支持的平台上加 flock 排他锁, 行与行不会交错
+- 记录字段: instance, file, graph_type, n, index, solver, strategy, seed, status, decisions / flips / xor_ops, time
+  graph_type / n / index 由 generatetseitin.py 的文件名 <graph_type>_<n>_<index>.cnf[.gz] 解析得到
+- aggregate() 单遍流式读取结果文件, 按 (solver, strategy, graph_type, n) 分组给出运行时间与决策数/翻转数的分位数
+
+命令行用法:
+    python3 results.py results.jsonl [more.jsonl ...] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+from array import array
+
+from portfolio import quantile
+
+try:
+    import fcntl
+except ImportError:  # Windows 上没有 fcntl, 只依赖 O_APPEND
+    fcntl = None
+
+GROUP_KEYS = ("solver", "strategy", "graph_type", "n")
+SOLVED_STATUSES = ("SAT", "UNSAT")
+WORK_FIELDS = ("decisions", "flips", "xor_ops")  # DPLL / WalkSAT / XOR 预处理的工作量字段
+
+
+def parse_instance_name(filename):
+    """
+    从 generatetseitin.py 生成的文件名中解析 (graph_type, n, index); 不符合命名规则时返回 (None, None, None).
+    graph_type 本身可以含下划线 (例如 L_n).
+    """
+    name = os.path.basename(filename)
+    for suffix in (".gz", ".cnf"):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    parts = name.rsplit("_", 2)
+    if len(parts) == 3 and parts[1].isdigit() and parts[2].isdigit():
+        return parts[0], int(parts[1]), int(parts[2])
+    return None, None, None
+
+
+def make_record(filename, solver, strategy, seed, status, time, **fields):
+    """
+    构造一条结果记录; fields 为求解器相关的字段 (decisions / flips / chain 等).
+    """
+    graph_type, n, index = parse_instance_name(filename)
+    record = {
+        "instance": os.path.basename(filename),
+        "file": filename,
+        "graph_type": graph_type,
+        "n": n,
+        "index": index,
+        "solver": solver,
+        "strategy": strategy,
+        "seed": seed,
+        "status": status,
+    }
+    record.update(fields)
+    record["time"] = time
+    return record
+
+
+def append_records(path, records):
+    """
+    把 records 追加到 JSONL 文件 path (不存在时创建). 并发写入安全: 一次加锁的 O_APPEND 写入.
+    """
+    data = "".join(json.dumps(record) + "\n" for record in records).encode()
+    if not data:
+        return
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)  # 关闭文件同时释放锁
+
+
+def iter_records(paths):
+    """
+    逐行读取一个或多个 JSONL 结果文件; 无法解析的行 (例如进程崩溃时写了一半) 跳过并在结束时提示.
+    """
+    skipped = 0
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    skipped += 1
+    if skipped:
+        print(f"Skipped {skipped} malformed lines.", file=sys.stderr)
+
+
+def aggregate(records, keys=GROUP_KEYS):
+    """
+    单遍流式聚合: 每组只保存已解出运行的时间与工作量 (decisions, flips 或 xor_ops) 两个 double 数组.
+    返回按分组键排序的字典列表, 每项含 runs / solved 以及 time 与 work 的 min / q25 / median / q75 / max.
+    """
+    groups = {}
+    for record in records:
+        key = tuple(record.get(k) for k in keys)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {"runs": 0, "time": array('d'), "work": array('d')}
+        group["runs"] += 1
+        if record.get("status") in SOLVED_STATUSES:
+            group["time"].append(record["time"])
+            group["work"].append(next((record[key] for key in WORK_FIELDS if key in record), 0))
+
+    rows = []
+    for key in sorted(groups, key=_sort_key):
+        group = groups[key]
+        row = dict(zip(keys, key))
+        row["runs"] = group["runs"]
+        row["solved"] = len(group["time"])
+        for name in ("time", "work"):
+            values = group[name]
+            for label, q in (("min", 0.0), ("q25", 0.25), ("median", 0.5), ("q75", 0.75), ("max", 1.0)):
+                row[f"{name}_{label}"] = quantile(values, q) if values else None
+        rows.append(row)
+    return rows
+
+
+def _sort_key(key):
+    # None 排在最后; 数值按数值排序 (n=10 在 n=100 之前)
+    return tuple((v is None, v if isinstance(v, (int, float)) else str(v)) for v in key)
+
+
+def format_table(rows):
+    columns = list(GROUP_KEYS) + ["runs", "solved", "time_q25", "time_median", "time_q75", "work_median"]
+    lines = ["\t".join(columns)]
+    for row in rows:
+        cells = []
+        for column in columns:
+            value = row.get(column)
+            cells.append(f"{value:.4g}" if isinstance(value, float) else str(value))
+        lines.append("\t".join(cells))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate JSONL solver results per (solver, strategy, graph_type, n).")
+    parser.add_argument("results", nargs="+", help="JSONL results files written with --results")
+    parser.add_argument("--json", action="store_true", help="Print one JSON object per group instead of a table")
+    args = parser.parse_args()
+
+    rows = aggregate(iter_records(args.results))
+    if args.json:
+        for row in rows:
+            print(json.dumps(row))
+    else:
+        print(format_table(rows))
+
+
+if __name__ == "__main__":
+    main()
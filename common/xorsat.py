@@ -0,0 +1,274 @@
+"""
+XOR 预处理, 供 walksat.py 与 dpll.py 共用 (--xor):
+generatetseitin.py 生成的公式是每个顶点一个奇偶约束展开成的 CNF, 直接求解时两个求解器都很吃力.
+这里先从子句组中还原 XOR 约束, 再用 GF(2) 上的高斯消元直接判定或化简:
+
+- 还原: 变量集合相同的子句归为一组. 子句禁止的是"所有文字都为假"这一个赋值, 其奇偶性为负文字个数的奇偶;
+  若一组 k 个变量的子句覆盖了某一奇偶性的全部 2^(k-1) 种符号组合, 它们恰好等价于 XOR(变量) = 另一奇偶性
+- 消元: 每个 XOR 约束存为一个 Python 整数 (第 v 位为变量 v, 第 0 位为右端常数), 一次整数异或即整行消元;
+  以最高位为主元逐行插入, 出现 0 = 1 即不可满足; 之后回代得到约化阶梯形
+- 判定: 消元矛盾 -> UNSAT; 自由变量取 0 (其余变量取假) 得到的赋值满足全部子句 -> SAT, 直接给出解.
+  纯 Tseitin 公式总是在这里被判定
+- 化简: 否则把约化后只含一个变量的行 (单子句) 与两个变量的行 (等价, 两个二元子句) 加入公式, 做单子句传播,
+  删除已满足的子句与为假的文字, 变量编号不变, 化简后的公式交给求解器
+
+命令行用法 (单独计时预处理):
+    python3 xorsat.py formula.cnf [--output reduced.cnf] [--results results.jsonl]
+"""
+
+import argparse
+import time
+from array import array
+
+from dimacs import CNFFormula
+from results import append_records, make_record
+
+MAX_XOR_WIDTH = 16  # 更宽的子句组需要 2^15 个以上的子句, 不会出现在生成的公式中
+
+
+class XorResult:
+    """
+    预处理结果:
+    - status: "SAT" / "UNSAT" 为直接判定, None 表示需要求解器继续求解
+    - formula: 化简后的 CNFFormula (status 为 None 时)
+    - solution: 满足赋值的文字列表 (status 为 "SAT" 时)
+    - stats: xors / xor_clauses / rank / xor_ops / units / binaries / clauses / reduced_clauses / time
+    """
+    def __init__(self, status, formula, solution, stats):
+        self.status = status
+        self.formula = formula
+        self.solution = solution
+        self.stats = stats
+
+
+def recover_xors(formula, max_width=MAX_XOR_WIDTH):
+    """
+    返回 (xors, covered): xors 为 (变量元组, 右端常数) 列表, covered 为被 XOR 约束完全表示的子句编号集合.
+    """
+    groups = {}
+    for idx, clause in enumerate(formula.clauses()):
+        lits = sorted(set(clause), key=abs)
+        variables = tuple(abs(lit) for lit in lits)
+        if not lits or len(lits) > max_width or len(set(variables)) != len(variables):
+            continue  # 空子句, 过宽的子句与重言式不参与还原
+        mask = 0
+        for i, lit in enumerate(lits):
+            if lit < 0:
+                mask |= 1 << i
+        groups.setdefault(variables, []).append((idx, mask))
+
+    xors = []
+    covered = set()
+    for variables, entries in groups.items():
+        full = 1 << (len(variables) - 1)
+        for parity in (0, 1):
+            masks = {mask for _, mask in entries if bin(mask).count("1") % 2 == parity}
+            if len(masks) == full:
+                xors.append((variables, 1 - parity))
+                covered.update(idx for idx, mask in entries if bin(mask).count("1") % 2 == parity)
+    return xors, covered
+
+
+def eliminate(xors):
+    """
+    GF(2) 高斯消元. 返回 (pivots, ops): pivots 为 {主元变量: 约化后的行}, 矛盾时为 None; ops 为整行异或次数.
+    """
+    pivots = {}
+    ops = 0
+    for variables, rhs in xors:
+        row = rhs
+        for var in variables:
+            row ^= 1 << var
+        while row > 1:
+            pivot = row.bit_length() - 1
+            other = pivots.get(pivot)
+            if other is None:
+                pivots[pivot] = row
+                break
+            row ^= other
+            ops += 1
+        else:
+            if row == 1:
+                return None, ops
+
+    # 回代: 按主元从小到大, 消去每行中其他主元 (较小主元的行已经约化)
+    for pivot in sorted(pivots):
+        row = pivots[pivot]
+        rest = row & ~(1 << pivot) & ~1
+        while rest:
+            bit = rest.bit_length() - 1
+            if bit in pivots and bit != pivot:
+                row ^= pivots[bit]
+                ops += 1
+            rest &= ~(1 << bit)
+        pivots[pivot] = row
+    return pivots, ops
+
+
+def _small_row_variables(row):
+    """
+    行中的变量 (最多两个时); 变量更多时返回 None.
+    """
+    row >>= 1
+    variables = []
+    while row:
+        if len(variables) == 2:
+            return None
+        low = row & -row
+        variables.append(low.bit_length())
+        row ^= low
+    return variables
+
+
+def _propagate(clauses, units):
+    """
+    用 units 做单子句传播化简 clauses; 返回 (化简后的子句列表, 赋值字典), 出现空子句时子句列表为 None.
+    """
+    value = {}
+    queue = list(units)
+    while True:
+        while queue:
+            lit = queue.pop()
+            if value.get(abs(lit)) == (lit < 0):
+                return None, value
+            value[abs(lit)] = lit > 0
+        reduced = []
+        for clause in clauses:
+            kept = []
+            for lit in clause:
+                v = value.get(abs(lit))
+                if v is None:
+                    kept.append(lit)
+                elif v == (lit > 0):
+                    break
+            else:
+                if not kept:
+                    return None, value
+                if len(kept) == 1:
+                    queue.append(kept[0])
+                reduced.append(kept)
+        if not queue:
+            return reduced, value
+        clauses = reduced
+
+
+def preprocess(formula, max_width=MAX_XOR_WIDTH):
+    """
+    对 CNFFormula 做 XOR 还原与消元, 返回 XorResult.
+    """
+    start = time.perf_counter()
+    xors, covered = recover_xors(formula, max_width)
+    pivots, ops = eliminate(xors)
+    nvars = formula.num_variables
+    stats = {"xors": len(xors), "xor_clauses": len(covered), "rank": len(pivots) if pivots is not None else None,
+             "xor_ops": ops, "units": 0, "binaries": 0, "clauses": len(formula), "reduced_clauses": 0}
+
+    def finish(status, reduced=None, solution=None):
+        stats["time"] = time.perf_counter() - start
+        return XorResult(status, reduced, solution, stats)
+
+    if pivots is None:
+        return finish("UNSAT")
+
+    # 自由变量取 0 的解; 不在 XOR 约束中的变量取假
+    assignment = [False] * (nvars + 1)
+    for pivot, row in pivots.items():
+        assignment[pivot] = bool(row & 1)
+    if all(any(assignment[lit] if lit > 0 else not assignment[-lit] for lit in clause)
+           for clause in formula.clauses()):
+        return finish("SAT", solution=[v if assignment[v] else -v for v in range(1, nvars + 1)])
+
+    units = []
+    extra = []
+    for pivot, row in pivots.items():
+        variables = _small_row_variables(row)
+        rhs = row & 1
+        if variables is None:
+            continue
+        if len(variables) == 1:
+            units.append(pivot if rhs else -pivot)
+        elif len(variables) == 2:
+            a, b = variables
+            # a XOR b = rhs
+            if rhs:
+                extra += [[a, b], [-a, -b]]
+            else:
+                extra += [[a, -b], [-a, b]]
+    clauses = [list(clause) for clause in formula.clauses()]
+    existing = {tuple(sorted(clause)) for clause in clauses if len(clause) == 2}
+    extra = [clause for clause in extra if tuple(sorted(clause)) not in existing]
+    stats["units"] = len(units)
+    stats["binaries"] = len(extra)
+    clauses += extra
+    if any(not clause for clause in clauses):
+        return finish("UNSAT")
+    reduced, value = _propagate(clauses, units + [c[0] for c in clauses if len(c) == 1])
+    if reduced is None:
+        return finish("UNSAT")
+    # 传播得到的赋值以单子句保留在公式中, 使求解器的解包含这些变量
+    reduced = [[v if value[v] else -v] for v in sorted(value)] + reduced
+
+    literals = array('i')
+    offsets = array('q', [0])
+    for clause in reduced:
+        literals.extend(clause)
+        offsets.append(len(literals))
+    stats["reduced_clauses"] = len(reduced)
+    return finish(None, reduced=CNFFormula(literals, offsets, nvars))
+
+
+def describe(result):
+    stats = result.stats
+    verdict = result.status or "UNKNOWN"
+    return (f"c XOR preprocessing: {stats['xors']} XORs from {stats['xor_clauses']}/{stats['clauses']} clauses, "
+            f"rank {stats['rank']}, {stats['units']} units, {stats['binaries']} binary clauses, "
+            f"{stats['time']:.4f} s -> {verdict}")
+
+
+def run_preprocessing(filename, formula, results_path=None):
+    """
+    求解器的 --xor 入口: 预处理并打印摘要; 给定 results_path 时追加一条 solver="xor" 的记录
+    (未判定的状态记为 UNKNOWN), 预处理时间因此在结果聚合中单独成组.
+    """
+    result = preprocess(formula)
+    print(describe(result))
+    if results_path:
+        append_records(results_path, [xor_record(filename, result)])
+    return result
+
+
+def xor_record(filename, result):
+    fields = {key: value for key, value in result.stats.items() if key != "time"}
+    return make_record(filename, "xor", "gauss", None, result.status or "UNKNOWN", result.stats["time"], **fields)
+
+
+def write_dimacs(formula, path):
+    with open(path, 'w') as f:
+        f.write(f"p cnf {formula.num_variables} {len(formula)}\n")
+        for clause in formula.clauses():
+            f.write(" ".join(map(str, clause)) + " 0\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recover XOR constraints and decide or simplify a CNF by GF(2) elimination.")
+    parser.add_argument("cnf_file", help="Input CNF file")
+    parser.add_argument("--output", default=None, help="Write the reduced formula (when undecided) to this DIMACS file")
+    parser.add_argument("--results", metavar="PATH", default=None, help="Append the preprocessing record to this JSONL file")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the binary .cnfb cache")
+    args = parser.parse_args()
+
+    from cnfcache import load_formula
+    result = run_preprocessing(args.cnf_file, load_formula(args.cnf_file, use_cache=not args.no_cache),
+                               results_path=args.results)
+    if result.status == "SAT":
+        print("s SATISFIABLE")
+    elif result.status == "UNSAT":
+        print("s UNSATISFIABLE")
+    else:
+        print("s UNKNOWN")
+        if args.output:
+            write_dimacs(result.formula, args.output)
+
+
+if __name__ == "__main__":
+    main()
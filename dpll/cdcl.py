@@ -0,0 +1,356 @@
+"""
+CDCL 模式 (dpll.py --cdcl): 冲突驱动的子句学习与非时序回跳, 用于和普通 DPLL 对比学习带来的差别.
+
+- 决策与 DPLL 一样是随机的: 在未赋值变量中均匀随机选一个, 极性也随机 (不使用 VSIDS),
+  这样两种模式的差别只来自学习与回跳
+- 两个观察文字做单子句传播, 观察文字固定放在子句的前两个位置; 被蕴含的文字放在其原因子句的第一个位置
+- 冲突分析取第一个唯一蕴含点 (1-UIP), 学到的子句回跳到其中第二高的决策层后立即成为单子句
+- 学习子句库按子句活跃度删除: 参与冲突分析的学习子句活跃度增加, 增量每次冲突按 clause_decay 放大 (等价于衰减);
+  学习子句数达到上限时删除活跃度较低的一半 (作为当前赋值原因的子句与二元子句保留);
+  保留的子句仍多于新上限的一半时继续删除, 二元子句同样计入, 只有锁定的子句不会被删除.
+  上限从原子句数的 learnts_factor 倍开始, 每次删除后乘 learnts_growth, 但不超过 max_learnts;
+  每次决策前检查上限, 因此除锁定的子句外, 子句库在决策时不超过 max_learnts, 长时间运行内存有界
+- 重启按冲突次数计: luby 使用 dpll.py 传入的 LubyGenerator, 第 k 次重启阈值为 luby_unit 乘以 Luby 序列前 k+1 项之和;
+  fixed / exponential 的间隔同样以冲突数计. 重启只撤销赋值, 学习子句保留
+"""
+
+import random
+import time
+
+
+class CDCLSolver:
+    def __init__(self, formula, max_learnts=20000, learnts_factor=1 / 3, learnts_growth=1.1, clause_decay=0.999):
+        nvars = formula.num_variables
+        self.nvars = nvars
+        self.value = [0] * (2 * nvars + 1)  # 下标为文字 (可为负): 1 真, -1 假, 0 未赋值
+        self.level = [0] * (nvars + 1)
+        self.reason = [-1] * (nvars + 1)    # 蕴含该变量的子句编号, 决策与第 0 层单子句为 -1
+        self.seen = [False] * (nvars + 1)
+        self.watches = [[] for _ in range(2 * nvars + 1)]
+        self.trail = []
+        self.trail_lim = []  # 每个决策层在 trail 中的起点
+        self.qhead = 0
+
+        self.clauses = []    # 原子句与学习子句 (列表, 观察文字交换位置时原地修改); 删除后为 None
+        self.activity = []
+        self.learnts = []    # 学习子句编号
+        self.free_ids = []   # 被删除的学习子句留下的编号, 新学习子句复用
+        self.clause_inc = 1.0
+        self.clause_decay = clause_decay
+        self.learnts_growth = learnts_growth
+        self.max_learnts = max_learnts
+
+        self.unsat = False
+        units = []
+        used = [False] * (nvars + 1)
+        for clause in formula.clauses():
+            clause = list(dict.fromkeys(clause))
+            if any(-lit in clause for lit in clause):
+                continue  # 重言式恒真
+            for lit in clause:
+                used[abs(lit)] = True
+            if not clause:
+                self.unsat = True
+            elif len(clause) == 1:
+                units.append(clause[0])
+            else:
+                self._attach(clause, learnt=False)
+        self.num_original = len(self.clauses)
+        self.learnts_limit = min(max(self.num_original * learnts_factor, 100), max_learnts)
+
+        # 未赋值变量集合 (列表 + 位置数组, O(1) 插入/删除/均匀随机选取); 只含公式中出现的变量
+        self.unassigned = [v for v in range(1, nvars + 1) if used[v]]
+        self.unassigned_pos = [-1] * (nvars + 1)
+        for i, v in enumerate(self.unassigned):
+            self.unassigned_pos[v] = i
+
+        for lit in units:
+            if self.value[lit] == -1:
+                self.unsat = True
+            elif self.value[lit] == 0:
+                self._enqueue(lit, -1)
+
+        self.decisions = 0
+        self.conflicts = 0
+        self.propagations = 0
+        self.restarts = 0
+        self.learned = 0
+        self.deleted = 0
+
+    def _attach(self, clause, learnt):
+        if learnt and self.free_ids:
+            cid = self.free_ids.pop()
+            self.clauses[cid] = clause
+            self.activity[cid] = 0.0
+        else:
+            cid = len(self.clauses)
+            self.clauses.append(clause)
+            self.activity.append(0.0)
+        self.watches[clause[0]].append(cid)
+        self.watches[clause[1]].append(cid)
+        if learnt:
+            self.learnts.append(cid)
+        return cid
+
+    def _enqueue(self, lit, reason):
+        var = abs(lit)
+        self.value[lit] = 1
+        self.value[-lit] = -1
+        self.level[var] = len(self.trail_lim)
+        self.reason[var] = reason
+        self.trail.append(lit)
+        pos = self.unassigned_pos
+        i = pos[var]
+        last = self.unassigned.pop()
+        if last != var:
+            self.unassigned[i] = last
+            pos[last] = i
+        pos[var] = -1
+
+    def propagate(self):
+        """
+        传播 trail 中尚未处理的赋值; 冲突时返回冲突子句编号, 否则返回 None.
+        """
+        value = self.value
+        clauses = self.clauses
+        watches = self.watches
+        trail = self.trail
+        start = self.qhead
+        while self.qhead < len(trail):
+            false_lit = -trail[self.qhead]
+            self.qhead += 1
+            ws = watches[false_lit]
+            i = j = 0
+            n = len(ws)
+            while i < n:
+                cid = ws[i]
+                i += 1
+                clause = clauses[cid]
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+                first = clause[0]
+                if value[first] == 1:
+                    ws[j] = cid
+                    j += 1
+                    continue
+                for k in range(2, len(clause)):
+                    lit = clause[k]
+                    if value[lit] != -1:
+                        clause[1], clause[k] = lit, false_lit
+                        watches[lit].append(cid)
+                        break
+                else:
+                    ws[j] = cid
+                    j += 1
+                    if value[first] == -1:
+                        del ws[j:i]
+                        self.qhead = len(trail)
+                        self.propagations += len(trail) - start
+                        return cid
+                    self._enqueue(first, cid)
+            del ws[j:]
+        self.propagations += len(trail) - start
+        return None
+
+    def analyze(self, confl):
+        """
+        1-UIP 冲突分析, 返回 (学习子句, 回跳层). 学习子句第一个文字为 UIP 的否定, 第二个文字为回跳层中的文字.
+        """
+        seen = self.seen
+        level = self.level
+        trail = self.trail
+        current = len(self.trail_lim)
+        learnt = [0]
+        counter = 0
+        p = 0
+        idx = len(trail) - 1
+        while True:
+            if confl >= self.num_original:
+                self._bump(confl)
+            clause = self.clauses[confl]
+            for q in (clause if p == 0 else clause[1:]):
+                var = abs(q)
+                if not seen[var] and level[var] > 0:
+                    seen[var] = True
+                    if level[var] >= current:
+                        counter += 1
+                    else:
+                        learnt.append(q)
+            while not seen[abs(trail[idx])]:
+                idx -= 1
+            p = trail[idx]
+            idx -= 1
+            var = abs(p)
+            seen[var] = False
+            counter -= 1
+            if counter == 0:
+                break
+            confl = self.reason[var]
+        learnt[0] = -p
+
+        backjump = 0
+        if len(learnt) > 1:
+            best = 1
+            for i in range(1, len(learnt)):
+                seen[abs(learnt[i])] = False
+                if level[abs(learnt[i])] > level[abs(learnt[best])]:
+                    best = i
+            learnt[1], learnt[best] = learnt[best], learnt[1]
+            backjump = level[abs(learnt[1])]
+        return learnt, backjump
+
+    def _bump(self, cid):
+        activity = self.activity
+        activity[cid] += self.clause_inc
+        if activity[cid] > 1e20:
+            for i in self.learnts:
+                activity[i] *= 1e-20
+            self.clause_inc *= 1e-20
+
+    def backtrack(self, target_level):
+        if len(self.trail_lim) <= target_level:
+            return
+        value = self.value
+        reason = self.reason
+        unassigned = self.unassigned
+        pos = self.unassigned_pos
+        trail = self.trail
+        mark = self.trail_lim[target_level]
+        while len(trail) > mark:
+            lit = trail.pop()
+            value[lit] = 0
+            value[-lit] = 0
+            var = abs(lit)
+            reason[var] = -1
+            pos[var] = len(unassigned)
+            unassigned.append(var)
+        del self.trail_lim[target_level:]
+        self.qhead = len(trail)
+
+    def reduce_db(self):
+        """
+        删除活跃度较低的一半学习子句 (锁定即作为当前赋值原因的子句与二元子句保留);
+        保留下来的子句仍多于新上限的一半时, 再按活跃度从低到高删除未锁定的子句 (包括二元子句),
+        使子句库在下一次删除前有空间学习新子句, 且上限始终不超过 max_learnts.
+        """
+        clauses = self.clauses
+        activity = self.activity
+        value = self.value
+        reason = self.reason
+        self.learnts.sort(key=activity.__getitem__)
+        half = len(self.learnts) // 2
+        limit = min(self.learnts_limit * self.learnts_growth, self.max_learnts)
+        unlocked = []
+        removed = set()
+        for i, cid in enumerate(self.learnts):
+            clause = clauses[cid]
+            if value[clause[0]] == 1 and reason[abs(clause[0])] == cid:
+                continue
+            unlocked.append(cid)
+            if i < half and len(clause) > 2:
+                removed.add(cid)
+        excess = len(self.learnts) - len(removed) - int(limit) // 2
+        for cid in unlocked:
+            if excess <= 0:
+                break
+            if cid not in removed:
+                removed.add(cid)
+                excess -= 1
+        touched = set()
+        for cid in removed:
+            touched.add(clauses[cid][0])
+            touched.add(clauses[cid][1])
+            clauses[cid] = None
+        for lit in touched:
+            self.watches[lit] = [cid for cid in self.watches[lit] if cid not in removed]
+        self.free_ids.extend(removed)
+        self.learnts = [cid for cid in self.learnts if cid not in removed]
+        self.deleted += len(removed)
+        self.learnts_limit = limit
+
+    def solve(self, strategy="luby", fixed_interval=100, exp_init=10, exp_factor=2, luby_unit=100, luby_gen=None,
+              max_decisions=1000000, restart_stats=None, should_stop=None, profiler=None):
+        """
+        返回 (solution, decisions); 无解或超出 max_decisions 时 solution 为 None.
+        strategy 为 luby 时必须传入 luby_gen (dpll.py 的 LubyGenerator).
+        restart_stats 与 dpll.py 相同, 每段额外记录 conflicts; should_stop 每 256 次决策检查一次.
+        """
+        if profiler is not None:
+            self.propagate = profiler.timed("propagate", self.propagate)
+            self.analyze = profiler.timed("analyze", self.analyze)
+            self.reduce_db = profiler.timed("reduce_db", self.reduce_db)
+
+        segment = {"time": time.time(), "decisions": 0, "conflicts": 0, "max_depth": 0}
+
+        def finish_segment():
+            if restart_stats is not None:
+                restart_stats.append({
+                    "restart": self.restarts,
+                    "decisions": self.decisions - segment["decisions"],
+                    "conflicts": self.conflicts - segment["conflicts"],
+                    "max_depth": segment["max_depth"],
+                    "time": time.time() - segment["time"],
+                })
+            if profiler is not None:
+                profiler.counters.update(decisions=self.decisions, conflicts=self.conflicts,
+                                         propagations=self.propagations, restarts=self.restarts,
+                                         learned=self.learned, deleted=self.deleted, learnts=len(self.learnts))
+                profiler.maximum("max_depth", segment["max_depth"])
+
+        def restart_due():
+            conflicts = self.conflicts
+            if strategy == "fixed":
+                return conflicts % fixed_interval == 0
+            if strategy == "exponential":
+                return conflicts >= exp_init * (exp_factor ** self.restarts)
+            if strategy == "luby":
+                return conflicts >= luby_unit * luby_gen.get_threshold(self.restarts)
+            return False
+
+        if self.unsat:
+            finish_segment()
+            return (None, 0)
+
+        while True:
+            confl = self.propagate()
+            if confl is not None:
+                self.conflicts += 1
+                if not self.trail_lim:
+                    finish_segment()
+                    return (None, self.decisions)
+                learnt, backjump = self.analyze(confl)
+                self.learned += 1
+                self.backtrack(backjump)
+                if len(learnt) == 1:
+                    self._enqueue(learnt[0], -1)
+                else:
+                    cid = self._attach(learnt, learnt=True)
+                    self._bump(cid)
+                    self._enqueue(learnt[0], cid)
+                self.clause_inc /= self.clause_decay
+                if restart_due():
+                    finish_segment()
+                    self.restarts += 1
+                    self.backtrack(0)
+                    segment.update(time=time.time(), decisions=self.decisions, conflicts=self.conflicts, max_depth=0)
+                continue
+
+            if len(self.learnts) >= self.learnts_limit:
+                self.reduce_db()
+            if not self.unassigned:
+                finish_segment()
+                return (list(self.trail), self.decisions)
+            if self.decisions >= max_decisions:
+                print("c TIMEOUT: Max decision limit reached.")
+                finish_segment()
+                return (None, self.decisions)
+            if should_stop is not None and self.decisions % 256 == 0 and should_stop():
+                finish_segment()
+                return (None, self.decisions)
+
+            var = random.choice(self.unassigned)
+            self.decisions += 1
+            self.trail_lim.append(len(self.trail))
+            if len(self.trail_lim) > segment["max_depth"]:
+                segment["max_depth"] = len(self.trail_lim)
+            self._enqueue(var if random.random() < 0.5 else -var, -1)
@@ -7,133 +7,311 @@ SAT solver with DPLL, random assignment order, multiple restart strategies, and
 - luby:        动态 Luby 重启(无限扩展)
 
 特点:
-1. 变量选择随机（使用 get_counter(formula) 后随机选）
+1. 变量选择随机（在增量维护的活跃文字集合 formula.active 中均匀随机选）
 2. 对选定变量的赋值先后顺序也随机 (先 True / 再 False 或相反)
 3. 当选择 Luby 重启时, 动态生成 Luby 序列, 不会用尽
 4. 统计并输出 **全局单调递增** 的决策次数（global_decision_id）
 5. 统计并输出求解时间
 """
 
+import os
 import sys
 import random
 import argparse
 import time
 
-sys.setrecursionlimit(10**7)
+# 添加对共享模块 (common/) 的引用路径
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from checkpoint import Checkpointer
+from cnfcache import load_formula
+from cdcl import CDCLSolver
+from portfolio import run_portfolio, summarize
+from profiling import Profiler, write_report
+from results import append_records, make_record
+from xorsat import run_preprocessing
 
 # ---------------------------
 # 全局流水号计数器
 # ---------------------------
 global_decision_id = 0  # 每次做变量赋值决策时递增
 
-def parse_dimacs(filename):
+def parse_dimacs(filename, use_cache=True):
     """
-    读取 DIMACS CNF 文件, 返回子句列表 (formula) 和变量个数 nvars
+    读取 DIMACS CNF 文件, 返回紧凑存储的 CNFFormula (见 common/dimacs.py).
+    use_cache 时优先使用同目录下的二进制缓存 (见 common/cnfcache.py), 没有则解析后写入.
     """
-    clauses = []
-    nvars = 0
-    with open(filename, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith('c'):
-                continue
-            if line.startswith('p'):
-                # e.g. p cnf <nvars> <nclauses>
-                parts = line.split()
-                nvars = int(parts[2])
-                continue
-            parts = line.split()
-            if parts[-1] == '0':
-                parts = parts[:-1]
-            clause = [int(x) for x in parts]
-            clauses.append(clause)
-    return clauses, nvars
+    return load_formula(filename, use_cache=use_cache)
 
 
-def bcp(formula, unit):
-    """
-    Boolean Constraint Propagation:
-    - 若子句含 unit, 该子句为真 -> 跳过
-    - 若子句含 -unit, 则删除 -unit
-    - 若删除后子句为空 -> 冲突(返回 -1)
+class WatchedFormula:
     """
-    modified = []
-    for clause in formula:
-        if unit in clause:
-            continue  # 已满足
-        if -unit in clause:
-            new_clause = [x for x in clause if x != -unit]
-            if len(new_clause) == 0:
-                return -1  # 冲突
-            modified.append(new_clause)
-        else:
-            modified.append(clause)
-    return modified
-
-
-def get_counter(formula):
+    基于 trail 的公式状态, 代替逐层复制子句列表的 bcp:
+    - formula 为 CNFFormula, 子句转为元组保存 (搜索中反复遍历, 元组比扁平数组切片快)
+    - value[lit]: 1 为真, -1 为假, 0 未赋值 (下标可为负文字, 利用 Python 负索引)
+    - 每个子句观察两个文字 (watch_a / watch_b 为子句内下标), 赋值时只访问被观察到变假的文字的子句
+    - 回溯时只需按 trail 撤销赋值, 观察文字无需恢复
+
+    同时增量维护文字出现次数索引, 代替每个结点重新统计整个公式的 get_counter:
+    - occ[lit]: 含 lit 且尚未满足的子句数 (sat_count[c] 为子句 c 中为真的文字数, 为 0 即未满足)
+    - active: 未赋值且 occ > 0 的文字, 即原 get_counter 返回的键集合
+    - pure:   active 中相反文字 occ 为 0 的文字, 即纯文字
+    active / pure 以列表加位置数组保存, 插入/删除 O(1), 可直接 random.choice.
+    只有 occ 跨过 0 或文字被赋值/撤销时才需要更新两个集合.
     """
-    统计公式中每个文字出现的次数, 用于收集随机选择的候选.
-    """
-    counter = {}
-    for clause in formula:
-        for lit in clause:
-            counter[lit] = counter.get(lit, 0) + 1
-    return counter
-
-
-def pure_literal(formula):
-    """
-    纯文字消元:
-    - 若一个文字从未出现相反文字, 则直接赋值为真.
-    """
-    if not formula:
-        return formula, []
-
-    assignment = []
-    counter = get_counter(formula)
-    pures = []
-    for lit in counter:
-        if -lit not in counter:
-            pures.append(lit)
+    def __init__(self, formula):
+        self.clauses = [tuple(dict.fromkeys(clause)) for clause in formula.clauses()]
+        nvars = formula.num_variables
+        self.nvars = nvars
+        self.value = [0] * (2 * nvars + 1)
+        self.watches = [[] for _ in range(2 * nvars + 1)]
+        self.watch_a = [0] * len(self.clauses)
+        self.watch_b = [0] * len(self.clauses)
+        self.trail = []
+        self.pending_units = []  # 变为单子句但尚未传播的子句
+        self.initial_units = []  # 输入中的单子句, 重启时重新加入 pending_units
+        self.has_empty_clause = False
+        self.occ_lists = [[] for _ in range(2 * nvars + 1)]
+        self.sat_count = [0] * len(self.clauses)
+        self.occ = [0] * (2 * nvars + 1)
+        for idx, clause in enumerate(self.clauses):
+            for lit in clause:
+                self.occ_lists[lit].append(idx)
+                self.occ[lit] += 1
+            if not clause:
+                self.has_empty_clause = True
+                continue
+            if len(clause) == 1:
+                self.initial_units.append(idx)
+            else:
+                self.watch_b[idx] = 1
+                self.watches[clause[1]].append(idx)
+            self.watches[clause[0]].append(idx)
+        self.pending_units.extend(self.initial_units)
+
+        self.active = []
+        self.active_pos = [-1] * (2 * nvars + 1)
+        self.pure = []
+        self.pure_pos = [-1] * (2 * nvars + 1)
+        for var in range(1, nvars + 1):
+            self._refresh(var)
+
+    @staticmethod
+    def _insert(items, pos, lit):
+        if pos[lit] < 0:
+            pos[lit] = len(items)
+            items.append(lit)
+
+    @staticmethod
+    def _remove(items, pos, lit):
+        i = pos[lit]
+        if i >= 0:
+            last = items.pop()
+            if last != lit:
+                items[i] = last
+                pos[last] = i
+            pos[lit] = -1
+
+    def _refresh(self, lit):
+        """
+        重新判断 lit 与 -lit 是否属于 active / pure.
+        """
+        value = self.value
+        occ = self.occ
+        for x in (lit, -lit):
+            if value[x] == 0 and occ[x] > 0:
+                self._insert(self.active, self.active_pos, x)
+                if occ[-x] == 0:
+                    self._insert(self.pure, self.pure_pos, x)
+                else:
+                    self._remove(self.pure, self.pure_pos, x)
+            else:
+                self._remove(self.active, self.active_pos, x)
+                self._remove(self.pure, self.pure_pos, x)
+
+    def _satisfy(self, lit):
+        """
+        lit 变为真: 含 lit 的子句中新满足的那些不再计入其中各文字的 occ.
+        """
+        occ = self.occ
+        sat_count = self.sat_count
+        clauses = self.clauses
+        refresh = self._refresh
+        refresh(lit)
+        for idx in self.occ_lists[lit]:
+            sat_count[idx] += 1
+            if sat_count[idx] == 1:
+                for x in clauses[idx]:
+                    occ[x] -= 1
+                    if occ[x] == 0:
+                        refresh(x)
+
+    def _unsatisfy(self, lit):
+        """
+        撤销 lit 的赋值 (value 已清零), _satisfy 的逆操作.
+        """
+        occ = self.occ
+        sat_count = self.sat_count
+        clauses = self.clauses
+        refresh = self._refresh
+        for idx in self.occ_lists[lit]:
+            sat_count[idx] -= 1
+            if sat_count[idx] == 0:
+                for x in clauses[idx]:
+                    occ[x] += 1
+                    if occ[x] == 1:
+                        refresh(x)
+        refresh(lit)
+
+    def assign(self, lit):
+        """
+        令 lit 为真并更新观察文字:
+        - 子句变为单子句时只记入 pending_units, 由 unit_propagation 处理 (与原 bcp 语义一致)
+        - 若某子句的文字全部为假 -> 冲突, 返回 False
+        """
+        value = self.value
+        value[lit] = 1
+        value[-lit] = -1
+        self.trail.append(lit)
+        self._satisfy(lit)
+
+        false_lit = -lit
+        clauses = self.clauses
+        watches = self.watches
+        watch_a = self.watch_a
+        watch_b = self.watch_b
+        watch_list = watches[false_lit]
+        kept = []
+        conflict = False
+        for idx in watch_list:
+            if conflict:
+                kept.append(idx)
+                continue
+            clause = clauses[idx]
+            if clause[watch_a[idx]] == false_lit:
+                slot = watch_a
+                other = clause[watch_b[idx]]
+            else:
+                slot = watch_b
+                other = clause[watch_a[idx]]
+            if value[other] == 1:
+                kept.append(idx)
+                continue
+            # 寻找新的非假文字作为观察文字
+            for pos, x in enumerate(clause):
+                if value[x] != -1 and x != other:
+                    slot[idx] = pos
+                    watches[x].append(idx)
+                    break
+            else:
+                kept.append(idx)
+                if value[other] == 0:
+                    self.pending_units.append(idx)
+                else:
+                    conflict = True
+        watches[false_lit] = kept
+        return not conflict
+
+    def undo(self, mark):
+        """
+        撤销 trail 中位置 mark 之后的所有赋值.
+        """
+        value = self.value
+        trail = self.trail
+        while len(trail) > mark:
+            lit = trail.pop()
+            value[lit] = 0
+            value[-lit] = 0
+            self._unsatisfy(lit)
+        self.pending_units.clear()
+
+    # 随搜索变化的全部状态; 观察文字与 active / pure 列表的顺序都依赖历史, 不能由 trail 重放得到
+    STATE_FIELDS = ("value", "watches", "watch_a", "watch_b", "trail", "pending_units",
+                    "occ", "sat_count", "active", "active_pos", "pure", "pure_pos")
+
+    def snapshot(self):
+        """
+        检查点所需的状态 (子句与出现列表不变, 不保存).
+        """
+        return {name: getattr(self, name) for name in self.STATE_FIELDS}
 
-    for pure in pures:
-        formula = bcp(formula, pure)
-        if formula == -1:
-            return -1, []
-        assignment.append(pure)
+    def restore(self, snapshot):
+        """
+        恢复 snapshot; 原地替换列表内容, 已持有这些列表引用的代码 (例如 profile_formula) 仍然有效.
+        """
+        for name in self.STATE_FIELDS:
+            getattr(self, name)[:] = snapshot[name]
 
-    return formula, assignment
+    def reset(self):
+        """
+        撤销全部赋值, 回到原始子句集 (用于重启).
+        """
+        self.undo(0)
+        self.pending_units.extend(self.initial_units)
 
+    def pure_literal(self):
+        """
+        纯文字消元:
+        - 若一个文字从未出现相反文字, 则直接赋值为真 (纯文字不会引起冲突).
+        与原先一样, 只处理进入时的纯文字集合 (快照), 赋值过程中新出现的纯文字留到下一个结点.
+        """
+        for lit in list(self.pure):
+            self.assign(lit)
 
-def unit_propagation(formula):
+    def unit_propagation(self):
+        """
+        单子句传播:
+        - 若某子句仅剩一个未赋值文字且未满足, 则该文字必须为真.
+        - 冲突时返回 False.
+        """
+        value = self.value
+        pending = self.pending_units
+        while pending:
+            clause = self.clauses[pending.pop()]
+            unit = None
+            for lit in clause:
+                v = value[lit]
+                if v == 1:
+                    break
+                if v == 0:
+                    unit = lit
+            else:
+                if unit is None:
+                    pending.clear()
+                    return False
+                if not self.assign(unit):
+                    pending.clear()
+                    return False
+        return True
+
+
+def profile_formula(formula, profiler):
     """
-    单子句传播:
-    - 若某子句仅剩一个文字, 则该文字必须为真.
+    给 formula (WatchedFormula) 的各阶段套上计时包装, 只影响这一个对象:
+    bcp (assign), undo, pure_literal, unit_propagation; 计时为包含式, unit_propagation 中含 bcp 的时间.
+    同时统计单子句传播赋值的文字数 (propagations) 与传播冲突数 (conflicts).
     """
-    if not formula:
-        return formula, []
-
-    assignment = []
-    unit_clauses = [c for c in formula if len(c) == 1]
-    while unit_clauses:
-        unit_lit = unit_clauses[0][0]
-        formula = bcp(formula, unit_lit)
-        if formula == -1:
-            return -1, []
-        assignment.append(unit_lit)
-        if not formula:
-            return formula, assignment
-        unit_clauses = [c for c in formula if len(c) == 1]
-    return formula, assignment
-
-
-def variable_selection(formula):
+    formula.assign = profiler.timed("bcp", formula.assign)
+    formula.undo = profiler.timed("undo", formula.undo)
+    formula.pure_literal = profiler.timed("pure_literal", formula.pure_literal)
+    unit_propagation = profiler.timed("unit_propagation", formula.unit_propagation)
+    trail = formula.trail
+
+    def counted_unit_propagation():
+        before = len(trail)
+        ok = unit_propagation()
+        profiler.count("propagations", len(trail) - before)
+        if not ok:
+            profiler.count("conflicts")
+        return ok
+    formula.unit_propagation = counted_unit_propagation
+
+
+def variable_selection(candidates):
     """
-    随机选取尚未赋值的文字 (用 get_counter 再随机挑)
+    从未满足子句中的未赋值文字 (formula.active) 中均匀随机选取一个.
+    与原先对 get_counter 的键随机选取的分布相同 (同一变量的两个文字都出现时各算一次).
     """
-    counter = get_counter(formula)
-    return random.choice(list(counter.keys()))
+    return random.choice(candidates)
 
 
 class LubyGenerator:
@@ -170,21 +348,43 @@ class LubyGenerator:
 
 def backtracking_with_strategy(
     formula,
-    assignment,
     strategy="none",
     fixed_interval=100000,
     exp_init=10,
     exp_factor=2,
     luby_gen=None,
     restart_count=0,
-    max_decisions=1000000  # 添加 max_decisions 参数
+    max_decisions=1000000,  # 添加 max_decisions 参数
+    restart_stats=None,
+    should_stop=None,
+    profiler=None,
+    checkpoint=None
 ):
     """
-    DPLL 主递归函数:
+    DPLL 主循环 (非递归, 用显式决策栈代替递归):
+    - formula 为 WatchedFormula, 失败时按 trail 撤销
     - 随机变量选择
     - 对选中变量, 随机决定先赋 True 还是先 False
-    - 根据不同策略判断是否重启
-    - 返回 (solution, final_decisions)
+    - 根据不同策略判断是否重启, 重启时撤销全部赋值, 清空决策栈, 从原始子句集重新搜索
+    - 返回 (solution, final_decisions), 无解时 solution 为 None
+
+    同一种子的结论与旧版本相同, 但决策数与重启次数不同 (重启语义与候选文字的顺序都变了, 见 README 的
+    Per-seed decision counts), 旧结果文件中的这两项不能与新结果直接比较.
+
+    决策栈元素为 [mark, second_choice]:
+    - mark: 做该决策前的 trail 长度, 回溯时撤销到此处
+    - second_choice: 尚未尝试的另一分支, 两个分支都试过后置为 None
+
+    若传入列表 restart_stats, 每一段搜索 (两次重启之间) 结束时追加一条统计:
+    {"restart": 第几段, "decisions": 本段决策数, "max_depth": 本段最大决策栈深度, "time": 本段耗时(秒)}
+
+    should_stop (可选) 每 256 次决策检查一次, 返回 True 时放弃搜索 (用于 portfolio 模式).
+
+    profiler (可选, 见 common/profiling.py): 记录各阶段耗时 (见 profile_formula),
+    以及 decisions / conflicts / backtracks / max_depth / restarts 计数.
+
+    checkpoint (可选, 见 common/checkpoint.py): 每个搜索结点入口检查一次是否该保存检查点, 保存公式状态, 决策栈,
+    重启计数, global_decision_id 与随机数状态; checkpoint.resumed 不为 None 时从中恢复, 搜索过程与不中断时相同.
 
     注意:
     我们用全局变量 global_decision_id 来记录“已做多少次决策”。
@@ -192,135 +392,242 @@ def backtracking_with_strategy(
     """
     global global_decision_id
 
-    # 如果达到了最大决策数，返回超时
-    if global_decision_id >= max_decisions:
-        print("c TIMEOUT: Max decision limit reached.")
-        return ([], global_decision_id)
-
-    # 纯文字消元
-    formula, pure_assign = pure_literal(formula)
-    if formula == -1:
-        return ([], global_decision_id)
-    if not formula:
-        return (assignment + pure_assign, global_decision_id)
-
-    # 单子句传播
-    formula, unit_assign = unit_propagation(formula)
-    if formula == -1:
-        return ([], global_decision_id)
-    if not formula:
-        return (assignment + pure_assign + unit_assign, global_decision_id)
-
-    # 更新 assignment
-    assignment = assignment + pure_assign + unit_assign
-
-    # 随机选取变量
-    variable = variable_selection(formula)
-    # 计一次决策
-    global_decision_id += 1
-
-    # -------------------------------------------------
-    # 重启判断
-    # -------------------------------------------------
-    if strategy == "none":
-        pass
-    elif strategy == "fixed":
-        # 每 fixed_interval 次决策 => 重启
-        if global_decision_id % fixed_interval == 0:
-            restart_count += 1
-            # 清空 assignment，返回回溯起点
-            return backtracking_with_strategy(
-                formula, [],
-                strategy=strategy,
-                fixed_interval=fixed_interval,
-                exp_init=exp_init,
-                exp_factor=exp_factor,
-                luby_gen=luby_gen,
-                restart_count=restart_count,
-                max_decisions=max_decisions  # 传递 max_decisions
-            )
-
-    elif strategy == "exponential":
-        # 第 restart_count 次重启的阈值 => exp_init*(exp_factor^restart_count)
-        current_interval = exp_init * (exp_factor ** restart_count)
-        if global_decision_id >= current_interval:
-            restart_count += 1
-            return backtracking_with_strategy(
-                formula, [],
-                strategy=strategy,
-                fixed_interval=fixed_interval,
-                exp_init=exp_init,
-                exp_factor=exp_factor,
-                luby_gen=luby_gen,
-                restart_count=restart_count,
-                max_decisions=max_decisions  # 传递 max_decisions
-            )
-
-    elif strategy == "luby":
-        if luby_gen is None:
-            luby_gen = LubyGenerator()
-        threshold = luby_gen.get_threshold(restart_count)
-        if global_decision_id >= threshold:
-            restart_count += 1
-            return backtracking_with_strategy(
-                formula, [],
-                strategy=strategy,
-                fixed_interval=fixed_interval,
-                exp_init=exp_init,
-                exp_factor=exp_factor,
-                luby_gen=luby_gen,
-                restart_count=restart_count,
-                max_decisions=max_decisions  # 传递 max_decisions
-            )
-
-    # 随机决定先尝试 True 或 False
-    if random.random() < 0.5:
-        first_choice, second_choice = variable, -variable
+    if strategy == "luby" and luby_gen is None:
+        luby_gen = LubyGenerator()
+
+    segment_start_time = time.time()
+    segment_start_decisions = global_decision_id
+    segment_max_depth = 0
+    stack = []
+
+    resumed = checkpoint.resumed if checkpoint is not None else None
+    if resumed is not None:
+        formula.restore(resumed["formula"])
+        stack = resumed["stack"]
+        restart_count = resumed["restart_count"]
+        global_decision_id = resumed["decisions"]
+        segment_start_decisions = resumed["segment_start_decisions"]
+        segment_max_depth = resumed["segment_max_depth"]
+        if restart_stats is not None:
+            restart_stats.extend(resumed["restart_stats"])
+        random.setstate(resumed["random"])
+
+    if profiler is not None:
+        profile_formula(formula, profiler)
+        profiler.counters.update(decisions=0, conflicts=0, backtracks=0, max_depth=0, restarts=0)
+
+    def finish_segment():
+        if profiler is not None:
+            profiler.counters["max_depth"] = max(profiler.counters["max_depth"], segment_max_depth)
+        if restart_stats is not None:
+            restart_stats.append({
+                "restart": restart_count,
+                "decisions": global_decision_id - segment_start_decisions,
+                "max_depth": segment_max_depth,
+                "time": time.time() - segment_start_time,
+            })
+
+    while True:
+        # -------------------------------------------------
+        # 进入一个搜索结点
+        # -------------------------------------------------
+        # 如果达到了最大决策数，返回超时
+        if global_decision_id >= max_decisions:
+            print("c TIMEOUT: Max decision limit reached.")
+            finish_segment()
+            return (None, global_decision_id)
+        if should_stop is not None and global_decision_id % 256 == 0 and should_stop():
+            finish_segment()
+            return (None, global_decision_id)
+        if checkpoint is not None and checkpoint.due():
+            checkpoint.save({
+                "formula": formula.snapshot(),
+                "stack": stack,
+                "restart_count": restart_count,
+                "decisions": global_decision_id,
+                "segment_start_decisions": segment_start_decisions,
+                "segment_max_depth": segment_max_depth,
+                "restart_stats": restart_stats or [],
+                "random": random.getstate(),
+            })
+
+        # 纯文字消元 (没有未赋值的活跃文字即所有子句均已满足)
+        if not formula.active:
+            finish_segment()
+            return (list(formula.trail), global_decision_id)
+        formula.pure_literal()
+
+        # 单子句传播
+        if formula.unit_propagation():
+            if not formula.active:
+                finish_segment()
+                return (list(formula.trail), global_decision_id)
+
+            # 随机选取变量
+            variable = variable_selection(formula.active)
+            # 计一次决策
+            global_decision_id += 1
+            if profiler is not None:
+                profiler.counters["decisions"] += 1
+
+            # 重启判断
+            restart = False
+            if strategy == "fixed":
+                # 每 fixed_interval 次决策 => 重启
+                restart = global_decision_id % fixed_interval == 0
+            elif strategy == "exponential":
+                # 第 restart_count 次重启的阈值 => exp_init*(exp_factor^restart_count)
+                restart = global_decision_id >= exp_init * (exp_factor ** restart_count)
+            elif strategy == "luby":
+                restart = global_decision_id >= luby_gen.get_threshold(restart_count)
+            if restart:
+                finish_segment()
+                restart_count += 1
+                if profiler is not None:
+                    profiler.counters["restarts"] += 1
+                # 回到原始子句集
+                stack.clear()
+                formula.reset()
+                segment_start_time = time.time()
+                segment_start_decisions = global_decision_id
+                segment_max_depth = 0
+                continue
+
+            # 随机决定先尝试 True 或 False
+            if random.random() < 0.5:
+                first_choice, second_choice = variable, -variable
+            else:
+                first_choice, second_choice = -variable, variable
+
+            stack.append([len(formula.trail), second_choice])
+            if len(stack) > segment_max_depth:
+                segment_max_depth = len(stack)
+            if formula.assign(first_choice):
+                continue
+            if profiler is not None:
+                profiler.counters["conflicts"] += 1
+
+        # -------------------------------------------------
+        # 回溯: 找到最近一个还有未尝试分支的决策
+        # -------------------------------------------------
+        while True:
+            if not stack:
+                finish_segment()
+                return (None, global_decision_id)
+            frame = stack[-1]
+            mark, second_choice = frame
+            formula.undo(mark)
+            if profiler is not None:
+                profiler.counters["backtracks"] += 1
+            if second_choice is None:
+                stack.pop()
+                continue
+            frame[1] = None
+            if formula.assign(second_choice):
+                break
+            if profiler is not None:
+                profiler.counters["conflicts"] += 1
+
+
+def solve_formula(cnf, options, should_stop=None, profiler=None, restart_stats=None, checkpoint=None):
+    """
+    按 options 求解 CNFFormula, 返回 (solution, decisions):
+    options 中 cdcl 为 True 时使用 cdcl.py 的 CDCLSolver (重启间隔按冲突数计, luby_unit / max_learnts 只用于该模式),
+    否则为 backtracking_with_strategy 的关键字参数. checkpoint 只支持非 CDCL 模式.
+    """
+    options = dict(options)
+    cdcl = options.pop("cdcl", False)
+    luby_unit = options.pop("luby_unit", 100)
+    max_learnts = options.pop("max_learnts", 20000)
+    if cdcl:
+        if checkpoint is not None:
+            raise ValueError("checkpointing is not supported with cdcl")
+        solver = CDCLSolver(cnf, max_learnts=max_learnts)
+        return solver.solve(luby_unit=luby_unit, luby_gen=LubyGenerator(), restart_stats=restart_stats,
+                            should_stop=should_stop, profiler=profiler, **options)
+    formula = WatchedFormula(cnf)
+    if formula.has_empty_clause:
+        return (None, 0)
+    return backtracking_with_strategy(formula, restart_stats=restart_stats, should_stop=should_stop,
+                                      profiler=profiler, checkpoint=checkpoint, **options)
+
+
+def solve_seed(data, seed, should_stop=None):
+    """
+    portfolio worker: data 为 (cnf, options, profile), cnf 为 CNFFormula, options 为 backtracking_with_strategy 的关键字参数,
+    profile 为 True 时在结果中附带剖析报告.
+    每次调用前重置全局决策计数, 同一进程可依次求解多个种子.
+    """
+    global global_decision_id
+    cnf, options, profile = data
+    global_decision_id = 0
+    random.seed(seed)
+    profiler = Profiler() if profile else None
+    start_time = time.time()
+    solution, decisions = solve_formula(cnf, options, should_stop=should_stop, profiler=profiler)
+    if solution is not None:
+        status = "SAT"
+    elif should_stop is not None and should_stop():
+        status = "STOPPED"
+    elif decisions >= options.get("max_decisions", 1000000):
+        status = "TIMEOUT"
     else:
-        first_choice, second_choice = -variable, variable
-
-    # 尝试 first_choice
-    fc_formula = bcp(formula, first_choice)
-    if fc_formula != -1:
-        sol, decs = backtracking_with_strategy(
-            fc_formula, assignment + [first_choice],
-            strategy=strategy,
-            fixed_interval=fixed_interval,
-            exp_init=exp_init,
-            exp_factor=exp_factor,
-            luby_gen=luby_gen,
-            restart_count=restart_count,
-            max_decisions=max_decisions  # 传递 max_decisions
-        )
-        if sol:
-            return (sol, decs)
-
-    # 尝试 second_choice
-    sc_formula = bcp(formula, second_choice)
-    if sc_formula != -1:
-        sol, decs = backtracking_with_strategy(
-            sc_formula, assignment + [second_choice],
-            strategy=strategy,
-            fixed_interval=fixed_interval,
-            exp_init=exp_init,
-            exp_factor=exp_factor,
-            luby_gen=luby_gen,
-            restart_count=restart_count,
-            max_decisions=max_decisions  # 传递 max_decisions
-        )
-        if sol:
-            return (sol, decs)
-
-    # 都失败 => 回溯
-    return ([], global_decision_id)
+        status = "UNSAT"
+    result = {
+        "seed": seed,
+        "solved": status in ("SAT", "UNSAT"),
+        "status": status,
+        "decisions": decisions,
+        "time": time.time() - start_time,
+    }
+    if profiler is not None:
+        result["profile"] = profiler.report(solver=solver_name(options), seed=seed, status=status, **options)
+    return result
+
+
+def solver_name(options):
+    return "cdcl" if options.get("cdcl") else "dpll"
+
+
+def run_seeds(cnf_file, seeds, options, workers=None, mode="first", use_cache=True, profile=None, results_path=None,
+              cnf=None):
+    """
+    解析一次公式, 多个种子并行求解. mode="first" 时第一个得出结论 (SAT/UNSAT) 的种子胜出.
+    cnf 为已解析 (例如经过 XOR 预处理) 的公式, 为 None 时读取 cnf_file.
+    profile 为 JSON 剖析报告的输出路径 ("-" 为标准输出), 报告为按种子排列的列表.
+    results_path 为 JSONL 结果文件路径, 每个已完成的种子追加一条记录 (见 common/results.py).
+    """
+    if cnf is None:
+        cnf = parse_dimacs(cnf_file, use_cache=use_cache)
+    results = run_portfolio(solve_seed, (cnf, options, bool(profile)), seeds, workers=workers, mode=mode)
+    for r in sorted(results, key=lambda r: r["seed"]):
+        print(f"c seed {r['seed']}: {r['status']} decisions={r['decisions']} time={r['time']:.4f}")
+    finished = [r for r in results if r["solved"]]
+    if finished:
+        print("s SATISFIABLE" if finished[0]["status"] == "SAT" else "s UNSATISFIABLE")
+    else:
+        print("s UNKNOWN")
+    if mode == "all":
+        print(f"c Solved {len(finished)}/{len(results)} seeds.")
+        for key in ("time", "decisions"):
+            print(f"c {key}: {summarize(finished, key)}")
+    if profile:
+        write_report([r["profile"] for r in sorted(results, key=lambda r: r["seed"])], profile)
+    if results_path:
+        append_records(results_path, [
+            make_record(cnf_file, solver_name(options), options.get("strategy", "none"), r["seed"], r["status"], r["time"],
+                        decisions=r["decisions"])
+            for r in sorted(results, key=lambda r: r["seed"])
+        ])
+    return results
 
 
 def main():
     parser = argparse.ArgumentParser(description="SAT solver with random assignment & multiple restart strategies, time measure.")
     parser.add_argument("cnf_file", help="Input CNF file")
     parser.add_argument("seed", type=int, help="Random seed")
-    parser.add_argument("--restart", choices=["none","fixed","exponential","luby"], default="none",
-                        help="Restart strategy (default=none)")
+    parser.add_argument("--restart", choices=["none","fixed","exponential","luby"], default=None,
+                        help="Restart strategy (default=none, or luby with --cdcl)")
     parser.add_argument("--interval", type=int, default=100000,
                         help="Interval for fixed restart (default=100)")
     parser.add_argument("--init", type=int, default=10,
@@ -329,29 +636,99 @@ def main():
                         help="Exponent factor for exponential restart (default=2)")
     parser.add_argument("--max-decisions", type=int, default=1000000,
                         help="Max number of decisions before giving up (default=1000000)")
+    parser.add_argument("--restart-stats", action="store_true",
+                        help="Print decisions / max depth / time of every restart segment")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always parse the DIMACS text; do not read or write the binary .cnfb cache")
+    parser.add_argument("--num-seeds", type=int, default=1,
+                        help="Run seeds seed, seed+1, ... in parallel on one parsed formula (default=1)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes for --num-seeds (default=CPU count)")
+    parser.add_argument("--portfolio", choices=["first", "all"], default="first",
+                        help="first: stop when any seed finishes; all: run every seed for the runtime distribution")
+    parser.add_argument("--profile", metavar="PATH", default=None,
+                        help="Write per-phase timers and search counters as JSON to PATH ('-' for stdout)")
+    parser.add_argument("--results", metavar="PATH", default=None,
+                        help="Append one JSON record per run to the JSONL file PATH")
+    parser.add_argument("--cdcl", action="store_true",
+                        help="Conflict-driven clause learning with 1-UIP backjumping; restart intervals count conflicts")
+    parser.add_argument("--luby-unit", type=int, default=100,
+                        help="Conflicts per Luby unit for --cdcl --restart luby (default=100)")
+    parser.add_argument("--max-learnts", type=int, default=20000,
+                        help="Upper bound on the learned-clause database for --cdcl, checked before each decision; "
+                             "only clauses that are reasons for current assignments may exceed it (default=20000)")
+    parser.add_argument("--xor", action="store_true",
+                        help="Recover XOR constraints and decide or simplify the formula by GF(2) elimination first")
+    parser.add_argument("--checkpoint", metavar="PATH", default=None,
+                        help="Periodically save the trail, decision stack, counters and RNG state to PATH (single seed, no --cdcl)")
+    parser.add_argument("--checkpoint-interval", type=float, default=300,
+                        help="Seconds between checkpoints (default=300); SIGTERM also writes one and stops")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue from the --checkpoint file if it exists; the search is identical to an uninterrupted one")
     args = parser.parse_args()
+    if args.restart is None:
+        args.restart = "luby" if args.cdcl else "none"
+    if args.checkpoint and (args.cdcl or args.num_seeds > 1):
+        parser.error("--checkpoint supports a single seed without --cdcl")
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requires --checkpoint")
+
+    options = dict(
+        strategy=args.restart,
+        fixed_interval=args.interval,
+        exp_init=args.init,
+        exp_factor=args.factor,
+        max_decisions=args.max_decisions,
+    )
+    if args.cdcl:
+        options.update(cdcl=True, luby_unit=args.luby_unit, max_learnts=args.max_learnts)
+
+    # XOR 预处理: 直接判定时不再运行求解器, 否则求解化简后的公式 (预处理单独记一条 solver="xor" 的结果)
+    cnf = None
+    if args.xor:
+        preprocessed = run_preprocessing(args.cnf_file, parse_dimacs(args.cnf_file, use_cache=not args.no_cache),
+                                         results_path=args.results)
+        if preprocessed.status is not None:
+            print("s SATISFIABLE" if preprocessed.status == "SAT" else "s UNSATISFIABLE")
+            return
+        cnf = preprocessed.formula
+
+    if args.num_seeds > 1:
+        seeds = range(args.seed, args.seed + args.num_seeds)
+        run_seeds(args.cnf_file, seeds, options, workers=args.workers, mode=args.portfolio,
+                  use_cache=not args.no_cache, profile=args.profile, results_path=args.results, cnf=cnf)
+        return
 
     random.seed(args.seed)
 
     start_time = time.time()
 
-    clauses, nvars = parse_dimacs(args.cnf_file)
+    if cnf is None:
+        cnf = parse_dimacs(args.cnf_file, use_cache=not args.no_cache)
+    nvars = cnf.num_variables
 
-    solution, final_decisions = backtracking_with_strategy(
-        formula=clauses,
-        assignment=[],
-        strategy=args.restart,
-        fixed_interval=args.interval,
-        exp_init=args.init,
-        exp_factor=args.factor,
-        max_decisions=args.max_decisions  # 传递 max_decisions
-    )
+    checkpoint = None
+    if args.checkpoint:
+        checkpoint = Checkpointer(args.checkpoint, args.checkpoint_interval,
+                                  meta=dict(solver="dpll", file=args.cnf_file, seed=args.seed, xor=args.xor,
+                                            **{k: v for k, v in options.items() if k != "max_decisions"}))
+        if args.resume and checkpoint.load() is not None:
+            print(f"c Resuming from {args.checkpoint} at decision {checkpoint.resumed['decisions']}")
+        checkpoint.watch_signals()
+
+    restart_stats = []
+    profiler = Profiler() if args.profile else None
+    solution, final_decisions = solve_formula(cnf, options, restart_stats=restart_stats, profiler=profiler,
+                                              checkpoint=checkpoint)
 
     end_time = time.time()
     total_time = end_time - start_time
+    if checkpoint is not None:
+        total_time += checkpoint.elapsed_before
+        checkpoint.remove()
 
     # 输出结果
-    if solution:
+    if solution is not None:
         assigned_vars = set(abs(x) for x in solution)
         for v in range(1, nvars+1):
             if v not in assigned_vars:
@@ -366,6 +743,28 @@ def main():
     print(f"variable_selection was called {final_decisions} times.")
     print(f"c Time: {total_time:.4f} seconds")
 
+    # 输出重启统计
+    print(f"c Restarts: {max(len(restart_stats) - 1, 0)}")
+    if args.restart_stats:
+        for stat in restart_stats:
+            conflicts = f" conflicts={stat['conflicts']}" if "conflicts" in stat else ""
+            print(f"c restart {stat['restart']}: decisions={stat['decisions']}{conflicts} "
+                  f"max_depth={stat['max_depth']} time={stat['time']:.4f}")
+
+    status = "SAT" if solution is not None else "TIMEOUT" if final_decisions >= args.max_decisions else "UNSAT"
+
+    # 输出剖析报告
+    if profiler is not None:
+        profiler.counters["decisions_per_sec"] = final_decisions / total_time if total_time > 0 else 0.0
+        write_report(profiler.report(solver=solver_name(options), file=args.cnf_file, seed=args.seed, status=status,
+                                     strategy=args.restart, restart_segments=restart_stats), args.profile)
+
+    # 追加结构化结果记录
+    if args.results:
+        append_records(args.results, [make_record(args.cnf_file, solver_name(options), args.restart, args.seed, status, total_time,
+                                                  decisions=final_decisions,
+                                                  restarts=max(len(restart_stats) - 1, 0))])
+
 
 if __name__ == "__main__":
     main()
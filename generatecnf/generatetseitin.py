@@ -1,23 +1,33 @@
+"""
+在各类图上生成 Tseitin 公式 (DIMACS CNF).
+
+networkx / matplotlib 导入很慢 (约一秒), 只在需要它们的函数内部导入:
+grid 与 L_n 之外的图类型需要 networkx (L_n 只在每个块大小第一次出现时用它生成块图), 画图需要 matplotlib;
+生成 grid 实例或按需读取已生成的实例不导入它们.
+"""
+
 import os
-import networkx as nx
-import matplotlib.pyplot as plt
 import sys
 import random
-import gc
+import time
 import argparse  # 引入 argparse
-from cnfgen import TseitinFormula, CNF
+import gzip
+import hashlib
+import io
+import json
+import re
+from array import array
+from functools import lru_cache
+from itertools import product
+from math import prod
 from pathlib import Path
 
-# 设定脚本的工作目录
-os.chdir('/home/jiangtao/separation/328')
-
-# 添加对 cnfgen 库的引用路径
-sys.path.append('/home/jiangtao/cnfgen')
-
 def draw_graph_and_save(G, filepath):
     """
     将图 G 绘制并保存到 filepath (例如 'my_graph.png').
     """
+    import matplotlib.pyplot as plt
+    import networkx as nx
     plt.figure(figsize=(8, 6))
     nx.draw(G, with_labels=False, node_size=30, alpha=0.8)
     plt.savefig(filepath, dpi=300, bbox_inches='tight')
@@ -31,16 +41,47 @@ def generate_even_true_charges(num_nodes):
         charges[index] = True
     return charges
 
+def connect_components(G, rng=random, preserve_degrees=False):
+    """
+    原地修复 G 的连通性: 依次把每个连通分支接到前一个分支上, 代价与分支数成正比.
+    preserve_degrees=True 时用双边交换 (a-b, c-d 换成 a-c, b-d) 合并两个分支, 度序列不变;
+    所有度为偶数的图没有桥, 因此交换后两个分支必然连通. 否则直接在两个分支之间加一条边.
+    """
+    import networkx as nx
+    components = [list(c) for c in nx.connected_components(G)]
+    for prev, comp in zip(components, components[1:]):
+        a = rng.choice(prev)
+        c = rng.choice(comp)
+        if preserve_degrees and G.degree(a) > 0 and G.degree(c) > 0:
+            b = rng.choice(sorted(G.neighbors(a)))
+            d = rng.choice(sorted(G.neighbors(c)))
+            G.remove_edges_from([(a, b), (c, d)])
+            G.add_edges_from([(a, c), (b, d)])
+        else:
+            G.add_edge(a, c)
+    return G
+
+@lru_cache(maxsize=None)
+def block_graph_edges(n, d):
+    """
+    L_n 的每个块都是同一个 d-正则图 (seed=n), 只生成一次.
+    它由 n 完全确定, 若不连通则用确定性的度保持交换修复 (否则 L_n 永远不连通).
+    """
+    import networkx as nx
+    block_graph = nx.random_regular_graph(d, n, seed=n)
+    connect_components(block_graph, rng=random.Random(n), preserve_degrees=True)
+    return tuple(block_graph.edges())
+
 def generate_linear_block_graph(n, d=4, seed=1):
+    import networkx as nx
     G = nx.Graph()
     def block_node_label(i_block, local_index):
         return i_block * n + local_index
+    block_edges = block_graph_edges(n, d)
     for i in range(n):
-        block_graph = nx.random_regular_graph(d, n, seed=n)
-        mapping = {old: block_node_label(i, old) for old in range(n)}
-        block_graph = nx.relabel_nodes(block_graph, mapping)
-        G.add_nodes_from(block_graph.nodes())
-        G.add_edges_from(block_graph.edges())
+        base = block_node_label(i, 0)
+        G.add_nodes_from(range(base, base + n))
+        G.add_edges_from((base + u, base + v) for u, v in block_edges)
     for i in range(n-1):
         anchor_i = block_node_label(i, 0)
         anchor_i1 = block_node_label(i+1, 0)
@@ -52,68 +93,536 @@ def generate_linear_block_graph(n, d=4, seed=1):
             G.add_edge(path_vertex_list[idx], path_vertex_list[idx + 1])
     return G
 
-def save_formula_to_file(dimacs_str, directory, filename):
-    Path(directory).mkdir(parents=True, exist_ok=True)
-    filepath = os.path.join(directory, f"{filename}.cnf")
-    with open(filepath, 'w') as file:
-        file.write(dimacs_str)
-
-def generate_graph_and_formula(graph_type, n):
-    G = generate_graph(n, graph_type)
-    charges = generate_even_true_charges(len(G.nodes()))
-    formula = TseitinFormula(G, charges=charges)
-    return formula, G
-
-BASE_OUTPUT_DIR = "/home/jiangtao/separation/328/formulas"
-
-def generate_graphs_and_save_formulas(graph_type, start_nodes, max_nodes, step, instances_per_size):
-    for n in range(start_nodes, max_nodes + 1, step):
-        for instance in range(1, instances_per_size + 1):
-            formula, G = generate_graph_and_formula(graph_type, n)
-            dimacs_str = formula.to_dimacs()
-            directory_name = os.path.join(BASE_OUTPUT_DIR, graph_type)
-            filename = f"{graph_type}_{n}_{instance}"
-            save_formula_to_file(dimacs_str, directory_name, filename)
+WRITE_BUFFER_SIZE = 1 << 20
+TEMPLATE_MAX_DEGREE = 12  # 度不超过该值的顶点用缓存的格式串一次写出全部子句
 
-def generate_graph(n, graph_type):
-    while True:
-        if graph_type == 'tree':
-            G = nx.random_tree(n)
-        elif graph_type == 'grid':
-            dim = int(n**0.5)
-            if dim > 1:
-                G = nx.grid_2d_graph(dim, dim)
-            else:
-                continue
-        elif graph_type == 'random':
-            p = 0.5
-            G = nx.erdos_renyi_graph(n, p)
-        elif graph_type == 'regular':
-            degree_sequence = [4] * n
-            G = nx.random_degree_sequence_graph(degree_sequence)
-        elif graph_type == 'L_n':
-            G = generate_linear_block_graph(n, d=4, seed=None)
+# 以下用 (num_nodes, edges) 表示图: 顶点为 1..num_nodes, edges 为 (u, v) 且 u < v, 按字典序排列,
+# 第 i 条边 (从 1 开始) 即为 Tseitin 公式中的第 i 个变量, 与 cnfgen 的编号一致.
+
+def normalize_graph(G):
+    """
+    按 cnfgen (Graph.normalize) 的约定把 networkx 图转成 (num_nodes, edges):
+    顶点按排序后的顺序编号为 1..n (无法排序时按插入顺序), 边按 (min, max) 的字典序排列.
+    """
+    try:
+        nodes = sorted(G.nodes())
+    except TypeError:
+        nodes = list(G.nodes())
+    index = {node: i for i, node in enumerate(nodes, start=1)}
+    edges = set()
+    for a, b in G.edges():
+        u, v = index[a], index[b]
+        if u != v:
+            edges.add((min(u, v), max(u, v)))
+    return len(nodes), sorted(edges)
+
+def grid_graph_edges(dim):
+    """
+    与 normalize_graph(nx.grid_2d_graph(dim, dim)) 相同, 但不构造 networkx 图: 顶点 (i, j) 编号为 i*dim + j + 1.
+    """
+    edges = []
+    for i in range(dim):
+        for j in range(dim):
+            v = i * dim + j + 1
+            if i + 1 < dim:
+                edges.append((v, v + dim))
+            if j + 1 < dim:
+                edges.append((v, v + 1))
+    edges.sort()
+    return dim * dim, edges
+
+def linear_block_graph_edges(n, d=4):
+    """
+    与 normalize_graph(generate_linear_block_graph(n, d)) 相同, 但不构造 networkx 图.
+    顶点标签本身就是 0..N-1 的整数, 编号即为标签 + 1.
+    """
+    block_edges = block_graph_edges(n, d)
+    edges = []
+    for i in range(n):
+        base = i * n + 1
+        edges.extend((base + min(u, v), base + max(u, v)) for u, v in block_edges)
+    for i in range(n - 1):
+        path = [i * n] + [n * n + i * (n - 1) + (j - 1) for j in range(1, n)] + [(i + 1) * n]
+        edges.extend((min(a, b) + 1, max(a, b) + 1) for a, b in zip(path, path[1:]))
+    edges.sort()
+    return n * n + (n - 1) * (n - 1), edges
+
+def graph_csr(num_nodes, edges):
+    """
+    邻接表的 CSR 形式: 顶点 v 的邻边变量为 edge_vars[indptr[v-1]:indptr[v]], 按邻居编号升序.
+    edges 已按字典序排列, 依次追加时每个顶点的邻居自然是升序的 (先是较小的邻居, 再是较大的).
+    """
+    degree = [0] * (num_nodes + 1)
+    for u, v in edges:
+        degree[u] += 1
+        degree[v] += 1
+    indptr = array('q', [0]) * (num_nodes + 1)
+    for v in range(1, num_nodes + 1):
+        indptr[v] = indptr[v - 1] + degree[v]
+    fill = array('q', indptr[:-1])
+    edge_vars = array('i', bytes(4 * 2 * len(edges)))
+    for var, (u, v) in enumerate(edges, start=1):
+        edge_vars[fill[u - 1]] = var
+        fill[u - 1] += 1
+        edge_vars[fill[v - 1]] = var
+        fill[v - 1] += 1
+    return indptr, edge_vars
+
+def tseitin_clause_count(indptr, charges):
+    """
+    度为 d 的顶点产生 2^(d-1) 个子句; 孤立顶点若电荷为奇则产生一个空子句.
+    """
+    count = 0
+    for v in range(len(indptr) - 1):
+        degree = indptr[v + 1] - indptr[v]
+        if degree > 0:
+            count += 1 << (degree - 1)
+        elif charges[v]:
+            count += 1
+    return count
+
+def parity_clause_lines(lits, charge):
+    """
+    逐个产生 "lits 之和的奇偶性 == charge" 的 DIMACS 子句行, 顺序与 cnfgen 的 add_parity 相同.
+    """
+    desired_sign = 1 if charge else -1
+    for signs in product((1, -1), repeat=len(lits)):
+        if prod(signs) == desired_sign:
+            yield "".join(f"{lit * sign} " for lit, sign in zip(lits, signs)) + "0\n"
+
+@lru_cache(maxsize=None)
+def parity_template(degree, charge):
+    """
+    度为 degree 的顶点的全部奇偶子句的格式串, 第 i 个文字为 {i}; 同一 (degree, charge) 只构造一次,
+    之后每个顶点只需一次 str.format. 输出与 parity_clause_lines 相同.
+    """
+    desired_sign = 1 if charge else -1
+    lines = []
+    for signs in product((1, -1), repeat=degree):
+        if prod(signs) == desired_sign:
+            lines.append("".join(("{%d} " if sign > 0 else "-{%d} ") % i for i, sign in enumerate(signs)) + "0\n")
+    return "".join(lines)
+
+def write_tseitin_edges(num_nodes, edges, charges, filepath, compress=False):
+    """
+    流式写出 (num_nodes, edges) 上的 Tseitin 公式: 每处理一个顶点的奇偶约束就把子句写入带缓冲的文件,
+    不构造 networkx 图或 cnfgen 公式对象. 输出与 TseitinFormula(G, charges).to_dimacs() 逐字节相同.
+    compress=True 时写 gzip 文件 (头部 mtime 固定为 0, 相同内容得到相同字节).
+    先写入临时文件再改名, 因此 filepath 一旦存在就是完整的. 返回子句数.
+    """
+    indptr, edge_vars = graph_csr(num_nodes, edges)
+    charges = [bool(c) for c in charges] + [False] * (num_nodes - len(charges))
+    num_clauses = tseitin_clause_count(indptr, charges)
+    tmp = f"{filepath}.{os.getpid()}.tmp"
+    raw = open(tmp, 'wb', buffering=WRITE_BUFFER_SIZE)
+    stream = raw
+    if compress:
+        stream = gzip.GzipFile(filename=os.path.basename(filepath), mode='wb', fileobj=raw, mtime=0)
+    try:
+        with io.TextIOWrapper(stream, encoding='ascii') as out:
+            out.write(f"p cnf {len(edges)} {num_clauses}\n")
+            for v in range(num_nodes):
+                lits = edge_vars[indptr[v]:indptr[v + 1]]
+                if len(lits) <= TEMPLATE_MAX_DEGREE:
+                    out.write(parity_template(len(lits), charges[v]).format(*lits))
+                else:
+                    out.writelines(parity_clause_lines(lits, charges[v]))
+        raw.close()  # GzipFile 不会关闭外部传入的 fileobj
+        os.replace(tmp, filepath)
+    except BaseException:
+        raw.close()
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return num_clauses
+
+# 语料根目录: 命令行 --output-dir, 其次环境变量 TSEITIN_OUTPUT_DIR, 默认为当前目录下的 formulas/
+DEFAULT_OUTPUT_DIR = os.environ.get("TSEITIN_OUTPUT_DIR", "formulas")
+MANIFEST_NAME = "manifest.jsonl"  # 根目录下, 每个生成的实例一行
+CORPUS_CONFIG = "corpus.json"     # 每个图类型目录下, 记录该图族的基础种子
+INSTANCE_NAME = re.compile(r"^(?P<graph_type>.+)_(?P<n>\d+)_(?P<instance>\d+)\.cnf(?P<gz>\.gz)?$")
+
+# 各图类型的固定参数, 写入清单
+GRAPH_PARAMS = {
+    "tree": {},
+    "grid": {},
+    "random": {"p": 0.5},
+    "regular": {"degree": 4},
+    "L_n": {"degree": 4},
+}
+
+# 各图类型的最小顶点数: grid 至少 2x2; regular 与 L_n 的块是 4-正则图, 至少 5 个顶点
+MIN_NODES = {
+    "tree": 1,
+    "grid": 4,
+    "random": 1,
+    "regular": 5,
+    "L_n": 5,
+}
+
+def task_seed(base_seed, graph_type, n, instance):
+    """
+    每个 (graph_type, n, instance) 任务的随机种子, 只由 base_seed 与任务本身决定,
+    因此结果与 worker 数量和任务执行顺序无关.
+    """
+    key = f"{base_seed}:{graph_type}:{n}:{instance}".encode()
+    return int.from_bytes(hashlib.sha256(key).digest()[:8], 'little')
+
+def formula_path(graph_type, n, instance, compress=False, root=DEFAULT_OUTPUT_DIR):
+    suffix = ".cnf.gz" if compress else ".cnf"
+    return os.path.join(root, graph_type, f"{graph_type}_{n}_{instance}{suffix}")
+
+def file_sha256(filepath):
+    h = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def check_graph_size(graph_type, n):
+    """
+    检查图类型与顶点数, 不合法时抛出 ValueError. 在选定种子与写入任何文件之前调用.
+    """
+    if graph_type not in GRAPH_PARAMS:
+        raise ValueError(f"Unknown graph_type: {graph_type} (choose from {', '.join(GRAPH_PARAMS)})")
+    if n < MIN_NODES[graph_type]:
+        raise ValueError(f"{graph_type} needs at least {MIN_NODES[graph_type]} nodes, got {n}")
+
+def stored_corpus_seed(root, graph_type):
+    """
+    <root>/<graph_type>/corpus.json 中记录的基础种子, 尚无记录时为 None.
+    """
+    config = os.path.join(root, graph_type, CORPUS_CONFIG)
+    if not os.path.exists(config):
+        return None
+    with open(config) as f:
+        return json.load(f)["base_seed"]
+
+def corpus_seed(root, graph_type, seed=None):
+    """
+    语料目录中 graph_type 的基础种子: 已有 corpus.json 时沿用其中的记录, 否则为 seed (为 None 时随机选取).
+    只读不写, corpus.json 在第一个实例生成之后才由 record_corpus_seed 创建;
+    已有记录而给定的 seed 不同时报错, 避免同一目录混入不同种子生成的实例.
+    """
+    stored = stored_corpus_seed(root, graph_type)
+    if stored is None:
+        return seed if seed is not None else random.SystemRandom().randrange(1 << 32)
+    if seed is not None and seed != stored:
+        raise ValueError(f"{os.path.join(root, graph_type)} was generated with base seed {stored}, not {seed}; "
+                         "use another --output-dir")
+    return stored
+
+def record_corpus_seed(root, graph_type, base_seed, announce=False):
+    """
+    第一个实例写出后以独占方式创建 corpus.json, 返回其中记录的种子. 并发的另一个进程先创建了它时,
+    返回值可能与 base_seed 不同, 调用方须丢弃用 base_seed 生成的实例.
+    announce=True 时把新记录的种子打印到标准错误 (标准输出在 --batch 模式下只用于应答).
+    """
+    config = os.path.join(root, graph_type, CORPUS_CONFIG)
+    try:
+        fd = os.open(config, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
+        return stored_corpus_seed(root, graph_type)
+    with os.fdopen(fd, 'w') as f:
+        json.dump({"graph_type": graph_type, "base_seed": base_seed, "params": GRAPH_PARAMS[graph_type]}, f)
+    if announce:
+        print(f"Base seed: {base_seed}", file=sys.stderr)
+    return base_seed
+
+def discard_instance(filepath, entry):
+    """
+    删除用错误种子生成的实例; 若文件已被另一个进程替换 (哈希不同) 则保留.
+    """
+    if os.path.exists(filepath) and file_sha256(filepath) == entry["sha256"]:
+        os.remove(filepath)
+
+def read_manifest(root):
+    """
+    读取语料清单, 返回 {相对路径: 记录}; 同一文件出现多次时以最后一条为准.
+    """
+    entries = {}
+    path = os.path.join(root, MANIFEST_NAME)
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    entries[entry["file"]] = entry
+    return entries
+
+def append_manifest(root, entries):
+    """
+    整批记录用一次 O_APPEND 写入清单, 并发的生成进程之间行不会交错.
+    """
+    if not entries:
+        return
+    data = "".join(json.dumps(entry, sort_keys=True) + "\n" for entry in entries).encode()
+    fd = os.open(os.path.join(root, MANIFEST_NAME), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
+def generate_instance(task):
+    """
+    生成一个实例 (图, 电荷, 公式文件); 在 worker 进程中运行. 返回该实例的清单记录 (不含 file 与 base_seed).
+    networkx 的随机图生成器在 seed=None 时使用全局 random, 所以先用任务种子重置全局 random;
+    图与电荷都由任务种子 seed 决定.
+    """
+    graph_type, n, instance, seed, filepath, compress = task
+    random.seed(seed)
+    num_nodes, edges = generate_graph_edges(n, graph_type)
+    charges = generate_even_true_charges(num_nodes)
+    Path(os.path.dirname(filepath)).mkdir(parents=True, exist_ok=True)
+    num_clauses = write_tseitin_edges(num_nodes, edges, charges, filepath, compress=compress)
+    return instance_entry(task, num_nodes, edges, charges, num_clauses)
+
+def recover_instance(task):
+    """
+    为已存在但清单中没有记录的实例 (例如生成进程在改名之后, 追加清单之前被终止) 重建清单记录:
+    由任务种子重新生成图与电荷以得到统计量, 但不重写公式文件, 哈希取自已有文件.
+    """
+    graph_type, n, instance, seed, filepath, compress = task
+    random.seed(seed)
+    num_nodes, edges = generate_graph_edges(n, graph_type)
+    charges = generate_even_true_charges(num_nodes)
+    indptr, _ = graph_csr(num_nodes, edges)
+    return instance_entry(task, num_nodes, edges, charges, tseitin_clause_count(indptr, charges))
+
+def instance_entry(task, num_nodes, edges, charges, num_clauses):
+    graph_type, n, instance, seed, filepath, compress = task
+    return {"graph_type": graph_type, "n": n, "instance": instance, "params": GRAPH_PARAMS.get(graph_type, {}),
+            "seed": seed, "nodes": num_nodes, "odd_charges": sum(charges), "variables": len(edges),
+            "clauses": num_clauses, "sha256": file_sha256(filepath)}
+
+def manifest_entry(root, base_seed, filepath, entry):
+    return dict(entry, file=os.path.relpath(filepath, root), base_seed=base_seed)
+
+def ensure_instance(graph_type, n, instance, seed=None, root=DEFAULT_OUTPUT_DIR, compress=False):
+    """
+    按需生成: 返回实例文件路径, 文件不存在时才生成并追加清单记录. 生成是原子的, 并发请求同一实例时
+    各自生成的文件逐字节相同, 清单中的重复记录在读取时合并. seed 为该图族的基础种子 (见 corpus_seed).
+    生成会重置全局 random, 这里保存并恢复其状态, 调用方 (例如同一进程中的求解器) 不受影响.
+    """
+    return _ensure_instance(graph_type, n, instance, seed, root, compress)[0]
+
+def _ensure_instance(graph_type, n, instance, seed, root, compress):
+    """
+    ensure_instance 的实现, 返回 (文件路径, 清单记录); 文件已存在时记录为 None (清单中缺少它时先补上记录).
+    """
+    check_graph_size(graph_type, n)
+    base_seed = corpus_seed(root, graph_type, seed)
+    filepath = formula_path(graph_type, n, instance, compress, root)
+    task = (graph_type, n, instance, task_seed(base_seed, graph_type, n, instance), filepath, compress)
+    # 没有 corpus.json 时已有的文件来自种子未记录的中断运行, 无法确认其种子, 重新生成
+    exists = os.path.exists(filepath) and stored_corpus_seed(root, graph_type) is not None
+    if exists and os.path.relpath(filepath, root) in read_manifest(root):
+        return filepath, None
+    state = random.getstate()
+    try:
+        entry = (recover_instance if exists else generate_instance)(task)
+    finally:
+        random.setstate(state)
+    if exists:
+        append_manifest(root, [manifest_entry(root, base_seed, filepath, entry)])
+        return filepath, None
+    stored = record_corpus_seed(root, graph_type, base_seed, announce=seed is None)
+    if stored != base_seed:
+        # 另一个进程先记录了不同的种子: 按它的种子重新生成
+        discard_instance(filepath, entry)
+        return _ensure_instance(graph_type, n, instance, seed, root, compress)
+    entry = manifest_entry(root, base_seed, filepath, entry)
+    append_manifest(root, [entry])
+    return filepath, entry
+
+def ensure_path(filepath):
+    """
+    按文件路径按需生成: filepath 须形如 <root>/<graph_type>/<graph_type>_<n>_<instance>.cnf[.gz],
+    且 <root>/<graph_type>/corpus.json 已记录基础种子 (由先前的生成或 ensure_instance 创建).
+    """
+    match = INSTANCE_NAME.match(os.path.basename(filepath))
+    directory = os.path.dirname(os.path.abspath(filepath))
+    if match is None or os.path.basename(directory) != match["graph_type"] \
+            or not os.path.exists(os.path.join(directory, CORPUS_CONFIG)):
+        raise FileNotFoundError(f"{filepath} does not exist and is not part of a generated corpus")
+    return ensure_instance(match["graph_type"], int(match["n"]), int(match["instance"]),
+                           root=os.path.dirname(directory), compress=bool(match["gz"]))
+
+def generate_graphs_and_save_formulas(graph_type, start_nodes, max_nodes, step, instances_per_size, compress=False,
+                                      workers=1, seed=None, root=DEFAULT_OUTPUT_DIR):
+    """
+    生成所有 (n, instance) 实例. 已存在的文件视为完整 (写入是原子的) 并跳过, 因此中断后重新运行即可续做;
+    基础种子在第一个实例生成后记录在语料目录中, 续做时不给 --seed 也会沿用. 每完成一个实例即追加清单记录.
+    workers > 1 时使用进程池并行生成; 给定 seed 时输出与 workers 无关, 可完全复现.
+    """
+    sizes = range(start_nodes, max_nodes + 1, step)
+    for n in sizes:
+        check_graph_size(graph_type, n)
+    base_seed = corpus_seed(root, graph_type, seed)
+
+    def pending_tasks():
+        tasks = []
+        unrecorded = []
+        skipped = 0
+        recorded = read_manifest(root)
+        seed_recorded = stored_corpus_seed(root, graph_type) is not None
+        for n in sizes:
+            for instance in range(1, instances_per_size + 1):
+                filepath = formula_path(graph_type, n, instance, compress, root)
+                task = (graph_type, n, instance, task_seed(base_seed, graph_type, n, instance), filepath, compress)
+                if seed_recorded and os.path.exists(filepath):
+                    skipped += 1
+                    if os.path.relpath(filepath, root) not in recorded:
+                        unrecorded.append(task)
+                    continue
+                tasks.append(task)
+        return tasks, unrecorded, skipped
+
+    tasks, unrecorded, skipped = pending_tasks()
+    # 已存在但清单中没有记录的实例 (上次运行在改名与追加清单之间被终止): 补上记录
+    if unrecorded:
+        append_manifest(root, [manifest_entry(root, base_seed, task[4], recover_instance(task)) for task in unrecorded])
+        print(f"Recorded {len(unrecorded)} existing formulas missing from the manifest.")
+    generated = 0
+    if tasks and stored_corpus_seed(root, graph_type) is None:
+        # 先在本进程生成最小的一个实例并记录种子, 再并行生成其余实例
+        first = min(tasks, key=lambda task: task[1])
+        entry = generate_instance(first)
+        stored = record_corpus_seed(root, graph_type, base_seed, announce=seed is None)
+        if stored != base_seed:
+            discard_instance(first[4], entry)
+            if seed is not None:
+                raise ValueError(f"{os.path.join(root, graph_type)} was generated with base seed {stored}, not {seed}; "
+                                 "use another --output-dir")
+            base_seed = stored
+            tasks, _, skipped = pending_tasks()
         else:
-            raise ValueError(f"Unknown graph_type: {graph_type}")
+            append_manifest(root, [manifest_entry(root, base_seed, first[4], entry)])
+            tasks.remove(first)
+            generated = 1
+    seed = base_seed
 
-        if nx.is_connected(G):
-            return G
-        else: 
-            del G
-            gc.collect()
+    if workers == 1:
+        for task in tasks:
+            append_manifest(root, [manifest_entry(root, seed, task[4], generate_instance(task))])
+    else:
+        # 大实例先提交, 避免最后只剩一个大任务在跑
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        tasks.sort(key=lambda task: task[1], reverse=True)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(generate_instance, task): task for task in tasks}
+            for future in as_completed(futures):
+                append_manifest(root, [manifest_entry(root, seed, futures[future][4], future.result())])
+    print(f"Generated {generated + len(tasks)} formulas, skipped {skipped} existing.")
+
+def random_tree(n):
+    import networkx as nx
+    # networkx 3.4 起移除了 random_tree, 由 random_labeled_tree 取代 (同样基于随机 Prüfer 序列)
+    return (getattr(nx, 'random_tree', None) or nx.random_labeled_tree)(n)
+
+def generate_graph(n, graph_type):
+    """
+    生成连通图. 每种图要么构造即连通, 要么以很小的代价修复连通性, 不再整图重新采样.
+    """
+    import networkx as nx
+    if graph_type == 'tree':
+        return random_tree(n)
+    elif graph_type == 'grid':
+        dim = int(n**0.5)
+        if dim <= 1:
+            raise ValueError(f"grid needs at least 4 nodes, got {n}")
+        return nx.grid_2d_graph(dim, dim)
+    elif graph_type == 'random':
+        p = 0.5
+        G = nx.erdos_renyi_graph(n, p)
+        return connect_components(G)
+    elif graph_type == 'regular':
+        # 配对模型直接生成 4-正则图, 不像 random_degree_sequence_graph 那样可能失败重试
+        G = nx.random_regular_graph(4, n)
+        return connect_components(G, preserve_degrees=True)
+    elif graph_type == 'L_n':
+        return generate_linear_block_graph(n, d=4, seed=None)
+    else:
+        raise ValueError(f"Unknown graph_type: {graph_type}")
+
+def generate_graph_edges(n, graph_type):
+    """
+    与 normalize_graph(generate_graph(n, graph_type)) 相同. grid 与 L_n 不消耗随机数,
+    直接生成边表而不构造 networkx 图; 其余类型仍由 networkx 生成.
+    """
+    if graph_type == 'grid':
+        dim = int(n**0.5)
+        if dim <= 1:
+            raise ValueError(f"grid needs at least 4 nodes, got {n}")
+        return grid_graph_edges(dim)
+    elif graph_type == 'L_n':
+        return linear_block_graph_edges(n, d=4)
+    return normalize_graph(generate_graph(n, graph_type))
+
+def serve_batch(requests, replies, root=DEFAULT_OUTPUT_DIR, compress=False):
+    """
+    常驻生成模式: 从 requests 逐行读取 JSON 请求 {"graph_type", "n", "instance" (默认 1), "seed", "output_dir", "gzip"},
+    按 ensure_instance 生成 (已存在则复用), 每个请求向 replies 写一行 JSON 并立即 flush:
+    {"file", "generated", "time"} 加上新生成实例的清单记录; 出错时为 {"error", "request"}, 之后继续处理下一行.
+    解释器启动与模块导入只付一次, 小实例每个只需几毫秒.
+    """
+    for line in requests:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        start = time.perf_counter()
+        try:
+            request = json.loads(line)
+            filepath, entry = _ensure_instance(request["graph_type"], int(request["n"]), int(request.get("instance", 1)),
+                                               request.get("seed"), request.get("output_dir", root),
+                                               bool(request.get("gzip", compress)))
+            reply = dict(entry or {}, file=filepath, generated=entry is not None)
+        except Exception as e:
+            reply = {"error": f"{type(e).__name__}: {e}", "request": line}
+        reply["time"] = time.perf_counter() - start
+        replies.write(json.dumps(reply) + "\n")
+        replies.flush()
 
 # 设置命令行参数
 def main():
     parser = argparse.ArgumentParser(description='Generate and save graph formulas.')
-    parser.add_argument('graph_type', type=str, help='Type of the graph (e.g., tree, grid, regular, L_n)')
-    parser.add_argument('start_nodes', type=int, help='Starting number of nodes')
-    parser.add_argument('max_nodes', type=int, help='Maximum number of nodes')
-    parser.add_argument('step', type=int, help='Step size for number of nodes')
-    parser.add_argument('instances_per_size', type=int, help='Number of instances per graph size')
+    parser.add_argument('graph_type', type=str, nargs='?', choices=list(GRAPH_PARAMS), help='Type of the graph')
+    parser.add_argument('start_nodes', type=int, nargs='?', help='Starting number of nodes')
+    parser.add_argument('max_nodes', type=int, nargs='?', help='Maximum number of nodes')
+    parser.add_argument('step', type=int, nargs='?', help='Step size for number of nodes')
+    parser.add_argument('instances_per_size', type=int, nargs='?', help='Number of instances per graph size')
+    parser.add_argument('--gzip', action='store_true', help='Write gzip-compressed .cnf.gz files')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes for parallel generation (default: 1, 0 = CPU count)')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Base seed; per-instance seeds are derived from it '
+                             '(default: the one recorded in the output directory, else random and printed)')
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR,
+                        help='Corpus root; formulas go to <root>/<graph_type>/ and the manifest to <root>/manifest.jsonl '
+                             '(default: $TSEITIN_OUTPUT_DIR or ./formulas)')
+    parser.add_argument('--batch', action='store_true',
+                        help='Stay resident: read one JSON request {graph_type, n, instance, seed} per line from stdin '
+                             'and answer each with one JSON line on stdout')
 
     args = parser.parse_args()
 
-    generate_graphs_and_save_formulas(args.graph_type, args.start_nodes, args.max_nodes, args.step, args.instances_per_size)
+    if args.batch:
+        serve_batch(sys.stdin, sys.stdout, root=args.output_dir, compress=args.gzip)
+        return
+    if args.instances_per_size is None:
+        parser.error('graph_type, start_nodes, max_nodes, step and instances_per_size are required without --batch')
+    if args.step <= 0:
+        parser.error('step must be positive')
+    try:
+        for n in range(args.start_nodes, args.max_nodes + 1, args.step):
+            check_graph_size(args.graph_type, n)
+        corpus_seed(args.output_dir, args.graph_type, args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+
+    generate_graphs_and_save_formulas(args.graph_type, args.start_nodes, args.max_nodes, args.step, args.instances_per_size,
+                                      compress=args.gzip, workers=args.workers or None, seed=args.seed,
+                                      root=args.output_dir)
 
 if __name__ == '__main__':
     main()
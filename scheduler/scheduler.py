@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+基于 asyncio 的本地任务调度器, 代替逐个启动 dpll.py / walksat.py 的 shell 循环:
+
+- 清单 (manifest) 为 JSONL 文件, 每行一个任务: {"instance": 路径, "solver": dpll|cdcl|walksat, "seed": 种子,
+  "strategy": 重启策略或 WalkSAT 启发式, "options": {...}}; "seeds": [..] 可代替 "seed" 展开成多个任务.
+  options 为求解器参数 (例如 max_decisions, fixed_interval, max_flips, timeout, noise)
+- 每个并发槽位持有一个长驻 worker 进程 (worker.py), 通过标准输入/输出逐行交换 JSON;
+  worker 缓存解析过的公式, 槽位优先领取与上一个任务同一实例的任务, 因此同一公式只解析一次
+- 限制: 每个任务的墙钟时间 (--wall-limit) 与 worker 常驻内存 (--rss-limit, 读取 /proc/<pid>/status 轮询);
+  超限时杀掉 worker, 记录 WALL_LIMIT / RSS_LIMIT 并为该槽位重启 worker
+- worker 意外退出 (崩溃) 时任务重新排队, 最多重试 --retries 次, 仍失败记为 CRASHED; 任务内的 Python 异常记为 ERROR
+- 结果逐条追加到 JSONL 结果文件 (见 common/results.py), 每条记录带任务编号 job (由任务内容哈希得到);
+  重新运行同一命令时跳过结果文件中已有记录的任务, 因此中断后可以续做
+
+用法:
+    python3 scheduler.py manifest.jsonl results.jsonl [--jobs 8] [--wall-limit 600] [--rss-limit 4096] [--retries 2]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import OrderedDict, deque
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'common'))
+
+from results import append_records, iter_records, make_record
+
+WORKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'worker.py')
+WORK_KEYS = {"dpll": "decisions", "cdcl": "decisions", "walksat": "flips"}
+RSS_POLL_INTERVAL = 0.2  # 秒
+
+
+def job_id(job):
+    key = {name: job.get(name) for name in ("instance", "solver", "seed", "strategy", "options")}
+    return hashlib.sha1(json.dumps(key, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def load_manifest(path):
+    """
+    读取清单, 展开 seeds, 为每个任务加上 id; 同一任务重复出现时只保留一次.
+    """
+    jobs = OrderedDict()
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            spec = json.loads(line)
+            if "instance" not in spec or "solver" not in spec:
+                raise ValueError(f"{path}:{number}: a job needs 'instance' and 'solver'")
+            seeds = spec.pop("seeds", None)
+            for seed in (seeds if seeds is not None else [spec.get("seed")]):
+                job = {"instance": spec["instance"], "solver": spec["solver"], "seed": seed,
+                       "strategy": spec.get("strategy"), "options": spec.get("options") or {}}
+                job["id"] = job_id(job)
+                jobs.setdefault(job["id"], job)
+    return list(jobs.values())
+
+
+def completed_jobs(results_path):
+    if not os.path.exists(results_path):
+        return set()
+    return {record["job"] for record in iter_records([results_path]) if "job" in record}
+
+
+class JobPool:
+    """
+    待运行任务按实例分组 (保持清单顺序); take(prefer) 优先返回实例 prefer 的任务, 以复用 worker 中缓存的公式.
+    """
+    def __init__(self, jobs):
+        self.groups = OrderedDict()
+        for job in jobs:
+            self.groups.setdefault(job["instance"], deque()).append(job)
+
+    def __len__(self):
+        return sum(len(group) for group in self.groups.values())
+
+    def take(self, prefer=None):
+        group = self.groups.get(prefer)
+        if not group:
+            group = next((g for g in self.groups.values() if g), None)
+            if group is None:
+                return None
+        job = group.popleft()
+        if not group:
+            del self.groups[job["instance"]]
+        return job
+
+    def put_back(self, job):
+        self.groups.setdefault(job["instance"], deque()).appendleft(job)
+        self.groups.move_to_end(job["instance"], last=False)
+
+
+def read_rss(pid):
+    """
+    进程常驻内存 (MB); 读不到 /proc 时返回 None.
+    """
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+class Worker:
+    def __init__(self, formula_cache):
+        self.formula_cache = formula_cache
+        self.proc = None
+
+    async def start(self):
+        self.proc = await asyncio.create_subprocess_exec(
+            sys.executable, WORKER, "--formula-cache", str(self.formula_cache),
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, limit=1 << 24)
+
+    async def stop(self, kill=False):
+        proc, self.proc = self.proc, None
+        if proc is None or proc.returncode is not None:
+            return
+        if kill:
+            proc.kill()
+        else:
+            proc.stdin.close()
+        await proc.wait()
+
+    async def _watch_rss(self, rss_limit):
+        while True:
+            await asyncio.sleep(RSS_POLL_INTERVAL)
+            rss = read_rss(self.proc.pid)
+            if rss is not None and rss > rss_limit:
+                return rss
+
+    async def run(self, job, wall_limit=None, rss_limit=None):
+        """
+        发送一个任务并等待结果. 返回 (kind, reply): kind 为 "ok" / "WALL_LIMIT" / "RSS_LIMIT" / "CRASHED".
+        超限时 worker 被杀掉, 调用方需要重新 start().
+        """
+        if self.proc is None:
+            await self.start()
+        try:
+            self.proc.stdin.write((json.dumps(job) + "\n").encode())
+            await self.proc.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            await self.stop(kill=True)
+            return "CRASHED", None
+
+        reader = asyncio.ensure_future(self.proc.stdout.readline())
+        tasks = {reader}
+        watcher = None
+        if rss_limit:
+            watcher = asyncio.ensure_future(self._watch_rss(rss_limit))
+            tasks.add(watcher)
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=wall_limit, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        if reader in done:
+            line = reader.result()
+            if not line:
+                await self.stop(kill=True)
+                return "CRASHED", None
+            return "ok", json.loads(line)
+        await self.stop(kill=True)
+        if watcher is not None and watcher in done:
+            return "RSS_LIMIT", {"rss": watcher.result()}
+        return "WALL_LIMIT", None
+
+
+def job_record(job, status, elapsed, attempt, **fields):
+    strategy = job.get("strategy") or {"walksat": "random", "cdcl": "luby"}.get(job["solver"], "none")
+    return make_record(job["instance"], job["solver"], strategy, job.get("seed"), status, elapsed,
+                       job=job["id"], attempt=attempt, **fields)
+
+
+async def run_slot(pool, results_path, args, counts, attempts):
+    """
+    一个并发槽位: 持有一个 worker, 反复领取任务直到任务池为空. attempts 为各槽位共享的 {任务编号: 尝试次数}.
+    """
+    worker = Worker(args.formula_cache)
+    last_instance = None
+    try:
+        while True:
+            job = pool.take(prefer=last_instance)
+            if job is None:
+                return
+            last_instance = job["instance"]
+            attempt = attempts.get(job["id"], 0) + 1
+            attempts[job["id"]] = attempt
+            start = time.time()
+            kind, reply = await worker.run(job, wall_limit=args.wall_limit, rss_limit=args.rss_limit)
+            elapsed = time.time() - start
+
+            if kind == "CRASHED" and attempt <= args.retries:
+                counts["retried"] += 1
+                print(f"worker crashed on job {job['id']}, retrying ({attempt}/{args.retries})", file=sys.stderr)
+                pool.put_back(job)
+                last_instance = None
+                continue
+            if kind == "ok" and "error" in reply:
+                record = job_record(job, "ERROR", elapsed, attempt, error=reply["error"].strip().splitlines()[-1])
+                print(f"job {job['id']} failed:\n{reply['error']}", file=sys.stderr)
+            elif kind == "ok":
+                fields = {key: reply[key] for key in (WORK_KEYS[job["solver"]], "load_time", "cached") if key in reply}
+                record = job_record(job, reply["status"], reply["time"], attempt, **fields)
+            else:
+                record = job_record(job, kind, elapsed, attempt, **(reply or {}))
+            if kind != "ok":
+                last_instance = None  # 新 worker 中没有缓存的公式
+            append_records(results_path, [record])
+            counts[record["status"]] = counts.get(record["status"], 0) + 1
+            counts["done"] += 1
+            print(f"[{counts['done']}/{counts['total']}] {job['solver']} {os.path.basename(job['instance'])} "
+                  f"seed={job.get('seed')}: {record['status']} {record['time']:.2f}s", file=sys.stderr)
+    except asyncio.CancelledError:
+        await worker.stop(kill=True)  # 中断时不等待正在运行的任务
+        raise
+    finally:
+        await worker.stop()
+
+
+async def schedule(jobs, results_path, args):
+    done = completed_jobs(results_path)
+    pending = [job for job in jobs if job["id"] not in done]
+    print(f"{len(jobs)} jobs in manifest, {len(jobs) - len(pending)} already have results, "
+          f"{len(pending)} to run.", file=sys.stderr)
+    pool = JobPool(pending)
+    counts = {"total": len(pending), "done": 0, "retried": 0}
+    attempts = {}
+    slots = [asyncio.ensure_future(run_slot(pool, results_path, args, counts, attempts))
+             for _ in range(min(args.jobs, len(pending)))]
+    try:
+        await asyncio.gather(*slots)
+    finally:
+        for slot in slots:
+            slot.cancel()
+        await asyncio.gather(*slots, return_exceptions=True)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a manifest of solver jobs with long-lived workers and limits.")
+    parser.add_argument("manifest", help="JSONL manifest: one {instance, solver, seed(s), strategy, options} per line")
+    parser.add_argument("results", help="JSONL results file; jobs already recorded here are skipped (resume)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Concurrent workers (default: CPU count)")
+    parser.add_argument("--wall-limit", type=float, default=None, metavar="SECONDS",
+                        help="Kill a job and record WALL_LIMIT after this many seconds")
+    parser.add_argument("--rss-limit", type=float, default=None, metavar="MB",
+                        help="Kill a worker and record RSS_LIMIT when its resident memory exceeds this many MB")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="Times a job is re-queued after its worker crashed (default: 2)")
+    parser.add_argument("--formula-cache", type=int, default=4,
+                        help="Parsed formulas each worker keeps for reuse (default: 4)")
+    args = parser.parse_args()
+
+    jobs = load_manifest(args.manifest)
+    try:
+        counts = asyncio.run(schedule(jobs, args.results, args))
+    except KeyboardInterrupt:
+        sys.exit("Interrupted; re-run the same command to resume.")
+    summary = ", ".join(f"{key}={value}" for key, value in counts.items() if key not in ("total", "done"))
+    print(f"Finished {counts['done']}/{counts['total']} jobs ({summary}).", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
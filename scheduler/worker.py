@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+scheduler.py 的长驻 worker 进程:
+- 从标准输入逐行读取任务 (JSON: id, instance, solver, seed, strategy, options), 在本进程内调用
+  dpll.py / walksat.py 的 solve_seed 求解, 每个任务向标准输出写一行 JSON 结果
+- 解析过的公式按 LRU 缓存 (--formula-cache 个), 同一实例的后续任务不再解析; 解释器启动与模块导入只付一次
+- 协议使用标准输出的一个副本 (os.dup(1)), 文件描述符 1 随后指向标准错误: 求解器自身的输出 (例如 "c TIMEOUT"),
+  包括绕过 sys.stdout 直接写描述符 1 的输出, 都进入标准错误, 不会混入协议
+- 任务抛出异常时返回 {"id", "error"}, worker 继续处理下一个任务
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import traceback
+from collections import OrderedDict
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'common'))
+sys.path.append(os.path.join(ROOT, 'dpll'))
+sys.path.append(os.path.join(ROOT, 'walksat'))
+
+from cnfcache import load_formula
+
+SOLVERS = ("dpll", "cdcl", "walksat")
+
+
+class FormulaCache:
+    """
+    按路径缓存已解析的 CNFFormula, 超过 size 个时淘汰最久未使用的.
+    """
+    def __init__(self, size=4):
+        self.size = size
+        self.formulas = OrderedDict()
+
+    def get(self, path, use_cache=True):
+        formula = self.formulas.pop(path, None)
+        hit = formula is not None
+        if formula is None:
+            formula = load_formula(path, use_cache=use_cache)
+        self.formulas[path] = formula
+        while len(self.formulas) > self.size:
+            self.formulas.popitem(last=False)
+        return formula, hit
+
+
+def run_job(job, formulas):
+    """
+    求解一个任务, 返回结果字段: status, time, decisions / flips, load_time, cached.
+    """
+    solver = job["solver"]
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver: {solver}")
+    options = dict(job.get("options") or {})
+    start = time.time()
+    formula, hit = formulas.get(job["instance"], use_cache=options.pop("use_cache", True))
+    fields = {"load_time": time.time() - start, "cached": hit}
+
+    if solver == "walksat":
+        import walksat
+        timeout = options.pop("timeout", 36000)
+        options["heuristic"] = job.get("strategy") or "random"
+        r = walksat.solve_seed((job["instance"], formula, timeout, options, None), job["seed"], None)
+        fields.update(status="SAT" if r["solved"] else "TIMEOUT", time=r["time"], flips=r["flips"])
+    else:
+        import dpll
+        options["strategy"] = job.get("strategy") or ("luby" if solver == "cdcl" else "none")
+        if solver == "cdcl":
+            options["cdcl"] = True
+        r = dpll.solve_seed((formula, options, False), job["seed"])
+        fields.update(status=r["status"], time=r["time"], decisions=r["decisions"])
+    return fields
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-lived solver worker driven by scheduler.py over stdin/stdout.")
+    parser.add_argument("--formula-cache", type=int, default=4, help="Parsed formulas kept in memory (default: 4)")
+    args = parser.parse_args()
+
+    sys.stdout.flush()
+    protocol = os.fdopen(os.dup(1), 'w')
+    os.dup2(2, 1)
+    formulas = FormulaCache(args.formula_cache)
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        job = json.loads(line)
+        try:
+            reply = run_job(job, formulas)
+        except Exception:
+            reply = {"error": traceback.format_exc()}
+        reply["id"] = job["id"]
+        protocol.write(json.dumps(reply) + "\n")
+        protocol.flush()
+
+
+if __name__ == "__main__":
+    main()
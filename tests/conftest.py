@@ -0,0 +1,9 @@
+import os
+import sys
+
+# 与各脚本相同, 按目录导入模块 (common/dimacs.py 即 dimacs, walksat/walksat.py 即 walksat, ...)
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+for directory in ('common', 'generatecnf', 'walksat', 'dpll', 'scheduler'):
+    path = os.path.join(ROOT, directory)
+    if path not in sys.path:
+        sys.path.append(path)
@@ -0,0 +1,80 @@
+"""
+common/cnfcache.py: 缓存与解析结果相同; 截断的缓存改为重新解析; 解析期间源文件被改写时不写缓存.
+"""
+
+import os
+
+import pytest
+
+import cnfcache
+import dimacs
+
+TEXT = "p cnf 4 3\n1 -2 0\n2 3 -4 0\n-1 4 0\n"
+
+
+def as_lists(formula):
+    return (list(formula.literals), list(formula.offsets), formula.num_variables, formula.max_variable,
+            [list(part) for part in formula.occurrences()])
+
+
+@pytest.fixture
+def cnf(tmp_path):
+    path = tmp_path / "formula.cnf"
+    path.write_text(TEXT)
+    return str(path)
+
+
+def test_cache_round_trip(cnf):
+    expected = as_lists(dimacs.load_dimacs(cnf))
+    assert as_lists(cnfcache.load_formula(cnf)) == expected
+    assert os.path.exists(cnfcache.cache_path(cnf))
+    cached = cnfcache.read_cache(cnf)
+    assert cached is not None and as_lists(cached) == expected
+
+
+def test_truncated_cache_falls_back_to_parsing(cnf):
+    expected = as_lists(dimacs.load_dimacs(cnf))
+    cnfcache.load_formula(cnf)
+    target = cnfcache.cache_path(cnf)
+    with open(target, 'rb') as f:
+        data = f.read()
+    # 末尾的对齐填充不足 8 字节, 截去 8 字节一定截到最后一段的数据
+    for length in (cnfcache.HEADER_SIZE, cnfcache.HEADER_SIZE + 16, len(data) // 2, len(data) - 8):
+        with open(target, 'wb') as f:
+            f.write(data[:length])
+        assert cnfcache.read_cache(cnf) is None
+        # 重新解析并写回完整的缓存
+        assert as_lists(cnfcache.load_formula(cnf)) == expected
+        assert os.path.getsize(target) == len(data)
+
+
+def test_no_cache_written_when_source_changes_while_parsing(cnf, monkeypatch):
+    load_dimacs = cnfcache.load_dimacs
+
+    def load_then_modify(filename, use_mmap=None):
+        formula = load_dimacs(filename, use_mmap=use_mmap)
+        with open(filename, 'a') as f:
+            f.write("3 4 0\n")
+        return formula
+
+    monkeypatch.setattr(cnfcache, "load_dimacs", load_then_modify)
+    formula = cnfcache.load_formula(cnf)
+    assert len(formula) == 3
+    assert not os.path.exists(cnfcache.cache_path(cnf))
+
+    # 文件不再变化后正常写入缓存, 缓存对应改写后的内容
+    monkeypatch.setattr(cnfcache, "load_dimacs", load_dimacs)
+    assert len(cnfcache.load_formula(cnf)) == 4
+    cached = cnfcache.read_cache(cnf)
+    assert cached is not None and len(cached) == 4
+
+
+def test_header_records_source_before_parsing(cnf, monkeypatch):
+    # write_cache 使用调用方在解析前取得的 stat 与摘要, 不再自己读取源文件
+    monkeypatch.setattr(cnfcache, "file_digest", lambda filename: b'\x01' * 32)
+    cnfcache.load_formula(cnf)
+    with open(cnfcache.cache_path(cnf), 'rb') as f:
+        header = f.read(cnfcache.HEADER_SIZE)
+    *_, mtime_ns, size, digest = cnfcache.struct.unpack(cnfcache.HEADER_FORMAT, header)
+    st = os.stat(cnf)
+    assert (mtime_ns, size, digest) == (st.st_mtime_ns, st.st_size, b'\x01' * 32)
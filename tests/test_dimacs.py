@@ -0,0 +1,46 @@
+"""
+common/dimacs.py 的 NumPy 解析路径与纯 Python 路径 (int() 逐个 token) 给出相同的公式, 对非法 token 同样报错.
+"""
+
+import pytest
+
+import dimacs
+
+np = pytest.importorskip("numpy")
+
+VALID = [
+    "p cnf 3 2\n1 -2 0\n+3 2 0\n",
+    "p cnf 3 2\n1\t-2 0 +3\n2 0\n",
+    "p cnf 3 2\n-0 +0 007 -003 0\n",
+    "c comment\np cnf 3 2\n  1 -2 0\n\n3 -1",
+    "p cnf 1 1\n-1 0\n%\n0\n",
+]
+INVALID = ["5-3 0", "5+3 0", "1 --5 0", "1 +-5 0", "1 - 0", "1 + 0", "1 5- 0", "1 - 5 0", "1.5 0", "1 x 0", "1 -"]
+
+
+def load(tmp_path, text, use_numpy, monkeypatch):
+    path = tmp_path / "formula.cnf"
+    path.write_text(text)
+    with monkeypatch.context() as m:
+        if not use_numpy:
+            m.setattr(dimacs, "np", None)
+        formula = dimacs.load_dimacs(str(path))
+    return list(formula.literals), list(formula.offsets), formula.num_variables, formula.max_variable
+
+
+@pytest.mark.parametrize("text", VALID)
+def test_numpy_and_python_paths_agree(tmp_path, monkeypatch, text):
+    assert load(tmp_path, text, True, monkeypatch) == load(tmp_path, text, False, monkeypatch)
+
+
+@pytest.mark.parametrize("body", INVALID)
+def test_invalid_tokens_rejected_by_both_paths(tmp_path, monkeypatch, body):
+    text = f"p cnf 5 1\n{body}\n"
+    for use_numpy in (True, False):
+        with pytest.raises(ValueError):
+            load(tmp_path, text, use_numpy, monkeypatch)
+
+
+def test_parse_ints_matches_int():
+    text = b"+5 -3 0 -0 +0 007\t12\n-123456789"
+    assert dimacs._parse_ints(text).tolist() == [int(token) for token in text.split()]
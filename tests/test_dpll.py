@@ -0,0 +1,116 @@
+"""
+WatchedFormula 增量维护的出现次数索引 (occ / sat_count / active / pure) 在赋值, 回溯与重启之后
+都与按当前赋值重新统计的结果相同.
+"""
+
+import random
+from array import array
+
+import pytest
+
+import dpll
+from dimacs import CNFFormula
+
+
+def random_formula(rng, num_variables, num_clauses, min_width=1, max_width=4):
+    """随机 min_width-max_width 文字子句, 可能含重复文字与同时含 x 和 -x 的子句."""
+    literals = array('i')
+    offsets = array('q', [0])
+    for _ in range(num_clauses):
+        for _ in range(rng.randint(min_width, max_width)):
+            literals.append(rng.choice((1, -1)) * rng.randint(1, num_variables))
+        offsets.append(len(literals))
+    return CNFFormula(literals, offsets, num_variables)
+
+
+def check_index(formula):
+    value = formula.value
+    nvars = formula.nvars
+    sat_count = [sum(value[lit] == 1 for lit in clause) for clause in formula.clauses]
+    occ = [0] * (2 * nvars + 1)
+    for clause, count in zip(formula.clauses, sat_count):
+        if count == 0:
+            for lit in clause:
+                occ[lit] += 1
+    literals = [lit for var in range(1, nvars + 1) for lit in (var, -var)]
+    active = {lit for lit in literals if value[lit] == 0 and occ[lit] > 0}
+    pure = {lit for lit in active if occ[-lit] == 0}
+
+    assert formula.sat_count == sat_count
+    assert formula.occ == occ
+    for items, pos, expected in ((formula.active, formula.active_pos, active),
+                                 (formula.pure, formula.pure_pos, pure)):
+        assert len(items) == len(expected) and set(items) == expected
+        for i, lit in enumerate(items):
+            assert pos[lit] == i
+        assert all(pos[lit] == -1 for lit in literals if lit not in expected)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_index_matches_recount_after_random_operations(seed):
+    rng = random.Random(seed)
+    cnf = random_formula(rng, rng.randint(3, 12), rng.randint(1, 30))
+    formula = dpll.WatchedFormula(cnf)
+    check_index(formula)
+    marks = []
+    for _ in range(200):
+        op = rng.random()
+        if op < 0.45:
+            unassigned = [lit for var in range(1, formula.nvars + 1) for lit in (var, -var)
+                          if formula.value[lit] == 0]
+            if unassigned:
+                marks.append(len(formula.trail))
+                formula.assign(rng.choice(unassigned))
+        elif op < 0.6:
+            formula.unit_propagation()
+        elif op < 0.7:
+            formula.pure_literal()
+        elif op < 0.95:
+            if marks:
+                mark = marks[rng.randrange(len(marks))]
+                del marks[marks.index(mark):]
+                formula.undo(mark)
+        else:
+            formula.reset()
+            marks.clear()
+            assert not formula.trail
+        check_index(formula)
+    formula.reset()
+    check_index(formula)
+    # 重启后的计数与新建的公式相同 (active / pure 的顺序依赖历史, 只比较集合)
+    fresh = dpll.WatchedFormula(cnf)
+    assert formula.occ == fresh.occ and formula.sat_count == fresh.sat_count
+    assert set(formula.active) == set(fresh.active) and set(formula.pure) == set(fresh.pure)
+
+
+@pytest.mark.parametrize("strategy", ["none", "fixed", "luby"])
+def test_index_matches_recount_during_search(strategy):
+    restarts = 0
+    rng = random.Random(7)
+    for trial in range(10):
+        # 接近可满足性阈值的随机 3-SAT, 搜索中有足够多的决策, 冲突与重启
+        formula = dpll.WatchedFormula(random_formula(rng, 14, 55, 3, 3))
+        assign, undo = formula.assign, formula.undo
+
+        def checked_assign(lit):
+            ok = assign(lit)
+            check_index(formula)
+            return ok
+
+        def checked_undo(mark):
+            undo(mark)
+            check_index(formula)
+
+        formula.assign, formula.undo = checked_assign, checked_undo
+        dpll.global_decision_id = 0
+        random.seed(trial)
+        restart_stats = []
+        solution, _ = dpll.backtracking_with_strategy(formula, strategy=strategy, fixed_interval=3,
+                                                      max_decisions=2000, restart_stats=restart_stats)
+        restarts += len(restart_stats) - 1
+        check_index(formula)
+        if solution is not None:
+            true = set(solution)
+            assert all(any(lit in true for lit in clause) for clause in formula.clauses)
+    if strategy != "none":
+        assert restarts > 0
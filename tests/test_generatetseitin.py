@@ -0,0 +1,61 @@
+"""
+流式写出的 Tseitin 公式与 cnfgen 逐字节相同.
+
+data/tseitin/ 中的 <graph_type>_<n>_1.cnf 由 cnfgen 0.9.6 的 TseitinFormula(G, charges).to_dimacs() 生成:
+G 为 nx.grid_2d_graph(dim, dim) 或 generate_linear_block_graph(n), charges 为 random.seed(task_seed(1, graph_type, n, 1))
+之后的 generate_even_true_charges(顶点数), 与 generate_instance 的随机序列相同.
+"""
+
+import gzip
+import os
+import random
+
+import pytest
+
+import generatetseitin
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'tseitin')
+BASE_SEED = 1
+GOLDEN = [("grid", 9), ("grid", 16), ("L_n", 5)]
+
+
+def golden_bytes(graph_type, n):
+    with open(os.path.join(DATA, f"{graph_type}_{n}_1.cnf"), 'rb') as f:
+        return f.read()
+
+
+def write_instance(graph_type, n, filepath, compress=False):
+    if graph_type == "L_n":
+        pytest.importorskip("networkx")  # L_n 的块图由 networkx 生成
+    seed = generatetseitin.task_seed(BASE_SEED, graph_type, n, 1)
+    generatetseitin.generate_instance((graph_type, n, 1, seed, str(filepath), compress))
+
+
+@pytest.mark.parametrize("graph_type,n", GOLDEN)
+def test_streaming_writer_matches_golden(tmp_path, graph_type, n):
+    filepath = tmp_path / f"{graph_type}_{n}_1.cnf"
+    write_instance(graph_type, n, filepath)
+    assert filepath.read_bytes() == golden_bytes(graph_type, n)
+
+
+@pytest.mark.parametrize("graph_type,n", GOLDEN[:1])
+def test_gzip_output_matches_golden(tmp_path, graph_type, n):
+    filepath = tmp_path / f"{graph_type}_{n}_1.cnf.gz"
+    write_instance(graph_type, n, filepath, compress=True)
+    with gzip.open(filepath, 'rb') as f:
+        assert f.read() == golden_bytes(graph_type, n)
+
+
+@pytest.mark.parametrize("graph_type,n", GOLDEN)
+def test_golden_matches_cnfgen(graph_type, n):
+    nx = pytest.importorskip("networkx")
+    cnfgen = pytest.importorskip("cnfgen")
+    if graph_type == "grid":
+        dim = int(n ** 0.5)
+        G = nx.grid_2d_graph(dim, dim)
+    else:
+        G = generatetseitin.generate_linear_block_graph(n)
+    random.seed(generatetseitin.task_seed(BASE_SEED, graph_type, n, 1))
+    charges = generatetseitin.generate_even_true_charges(len(G.nodes()))
+    expected = cnfgen.TseitinFormula(G, charges=charges).to_dimacs()
+    assert expected.encode() == golden_bytes(graph_type, n)
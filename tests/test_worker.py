@@ -0,0 +1,47 @@
+"""
+scheduler/worker.py 的标准输出只含协议应答: 求解器的输出 (print 或直接写文件描述符 1) 进入标准错误.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import worker
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'tseitin')
+
+
+def test_solver_output_goes_to_stderr(tmp_path):
+    instance = tmp_path / "grid_9_1.cnf"
+    with open(os.path.join(DATA, "grid_9_1.cnf"), 'rb') as f:
+        instance.write_bytes(f.read())
+    jobs = [
+        # 决策上限为 1: dpll 打印 "c TIMEOUT"
+        {"id": 1, "instance": str(instance), "solver": "dpll", "seed": 1, "options": {"max_decisions": 1}},
+        {"id": 2, "instance": str(instance), "solver": "walksat", "seed": 1},
+        {"id": 3, "instance": str(tmp_path / "missing.cnf"), "solver": "dpll", "seed": 1},
+    ]
+    # walksat 任务在求解前绕过 sys.stdout 直接写描述符 1, 这也不能混入协议
+    script = f"""
+import os, runpy, sys
+sys.path.append({os.path.join(os.path.dirname(worker.__file__), '..', 'walksat')!r})
+import walksat
+solve_seed = walksat.solve_seed
+def noisy_solve_seed(*args):
+    os.write(1, b"raw fd 1 output\\n")
+    return solve_seed(*args)
+walksat.solve_seed = noisy_solve_seed
+sys.argv = [{worker.__file__!r}]
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+    proc = subprocess.run([sys.executable, "-c", script],
+                          input="".join(json.dumps(job) + "\n" for job in jobs),
+                          capture_output=True, text=True, timeout=60)
+    replies = [json.loads(line) for line in proc.stdout.splitlines()]
+    assert [reply["id"] for reply in replies] == [1, 2, 3]
+    assert replies[0]["status"] == "TIMEOUT"
+    assert replies[1]["status"] == "SAT"
+    assert "error" in replies[2]
+    assert "c TIMEOUT" in proc.stderr
+    assert "raw fd 1 output" in proc.stderr
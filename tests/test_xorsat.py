@@ -0,0 +1,110 @@
+"""
+XOR 预处理 (common/xorsat.py) 的结论与化简后的公式都与 DPLL 在原公式上的结论一致.
+"""
+
+import random
+from array import array
+
+import pytest
+
+import dpll
+import generatetseitin
+from dimacs import CNFFormula
+from xorsat import preprocess
+
+GRID_DIMS = (2, 3, 4)
+
+
+def make_formula(clauses, num_variables):
+    literals = array('i')
+    offsets = array('q', [0])
+    for clause in clauses:
+        literals.extend(clause)
+        offsets.append(len(literals))
+    return CNFFormula(literals, offsets, num_variables)
+
+
+def tseitin_clauses(dim, rng, odd=False):
+    """dim x dim 网格上的 Tseitin 子句; odd 时翻转一个顶点的电荷, 总电荷为奇数, 公式不可满足."""
+    num_nodes, edges = generatetseitin.grid_graph_edges(dim)
+    indptr, edge_vars = generatetseitin.graph_csr(num_nodes, edges)
+    charges = [False] * num_nodes
+    for v in rng.sample(range(num_nodes), rng.randrange(0, num_nodes // 2 + 1) * 2):
+        charges[v] = True
+    if odd:
+        flipped = rng.randrange(num_nodes)
+        charges[flipped] = not charges[flipped]
+    clauses = []
+    for v in range(num_nodes):
+        lits = list(edge_vars[indptr[v]:indptr[v + 1]])
+        for line in generatetseitin.parity_clause_lines(lits, charges[v]):
+            clauses.append([int(token) for token in line.split()[:-1]])
+    return clauses, len(edges)
+
+
+def dpll_verdict(formula, seed=0):
+    """DPLL 在 formula 上的结论 ("SAT" / "UNSAT") 与解 (文字列表)."""
+    dpll.global_decision_id = 0
+    random.seed(seed)
+    solution, _ = dpll.solve_formula(formula, {"strategy": "none", "max_decisions": 10 ** 7})
+    return ("SAT" if solution is not None else "UNSAT"), solution
+
+
+def satisfies(solution, clauses):
+    true = set(solution)
+    return all(any(lit in true for lit in clause) for clause in clauses)
+
+
+def check_against_dpll(clauses, num_variables):
+    formula = make_formula(clauses, num_variables)
+    expected, _ = dpll_verdict(formula)
+    result = preprocess(formula)
+    if result.status is not None:
+        assert result.status == expected
+        if result.status == "SAT":
+            assert satisfies(result.solution, clauses)
+        return result.status
+    # 未判定: 化简后的公式与原公式同可满足, 其解 (保留了传播得到的单子句) 满足原公式
+    reduced = result.formula
+    assert reduced.num_variables == num_variables
+    verdict, solution = dpll_verdict(reduced)
+    assert verdict == expected
+    if verdict == "SAT":
+        assert satisfies(solution, clauses)
+    return None
+
+
+@pytest.mark.parametrize("dim", GRID_DIMS)
+@pytest.mark.parametrize("odd", [False, True])
+def test_tseitin_decided_like_dpll(dim, odd):
+    rng = random.Random(dim * 2 + odd)
+    for _ in range(5):
+        clauses, num_variables = tseitin_clauses(dim, rng, odd)
+        # 纯 Tseitin 公式总是由预处理直接判定
+        assert check_against_dpll(clauses, num_variables) == ("UNSAT" if odd else "SAT")
+
+
+@pytest.mark.parametrize("dim", GRID_DIMS)
+def test_mixed_instances_match_dpll(dim):
+    rng = random.Random(100 + dim)
+    undecided = 0
+    for trial in range(30):
+        clauses, num_variables = tseitin_clauses(dim, rng, odd=trial % 5 == 0)
+        # 在 XOR 约束之外加入少量随机的 2-3 文字子句, 使多数实例需要化简而不是直接判定
+        for _ in range(rng.randrange(1, num_variables // 2 + 2)):
+            variables = rng.sample(range(1, num_variables + 1), rng.randint(2, 3))
+            clauses.append([v if rng.random() < 0.5 else -v for v in variables])
+        rng.shuffle(clauses)
+        if check_against_dpll(clauses, num_variables) is None:
+            undecided += 1
+    # 化简路径确实被覆盖到
+    assert undecided > 0
+
+
+def test_generated_instance_matches_dpll(tmp_path):
+    import dimacs
+    filepath = tmp_path / "grid_16_1.cnf"
+    seed = generatetseitin.task_seed(1, "grid", 16, 1)
+    generatetseitin.generate_instance(("grid", 16, 1, seed, str(filepath), False))
+    formula = dimacs.load_dimacs(str(filepath))
+    assert check_against_dpll([list(clause) for clause in formula.clauses()], formula.num_variables) == "SAT"
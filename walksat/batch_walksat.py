@@ -0,0 +1,205 @@
+"""
+批量 WalkSAT: 在一个进程中用 NumPy 同步推进 K 条相互独立的随机游走链 (纯随机游走, 与 walksat.py 默认启发式相同).
+
+- 赋值存为 K x n 的布尔矩阵, 每条链每步: 均匀选一个未满足子句, 再均匀选其中一个文字翻转
+- 每个子句为真的文字个数存为 K x (m+1) 矩阵 (最后一列是哑子句, 用于填充)
+- 每条链的未满足子句存为一个列表 (K x m 矩阵的前 unsat_count[k] 项) 与每个子句在列表中的位置:
+  均匀选取一个未满足子句对所有链只需一次随机下标取值; 删除用末尾项填补空位, 追加写在列表末尾,
+  每步的更新对所有链一起以固定次数的数组运算完成
+- 每个变量的出现位置按子句去重, 记录净系数 (正文字个数 - 负文字个数); 同时含 x 与 -x 的子句系数为 0, 直接略去
+
+每步的数组运算开销几乎与活跃链数无关, 而翻转次数的分布有长尾: 多数链结束后, 剩下的几条链每次翻转的
+代价是标量求解器的数倍. 因此活跃链少于 handoff 条时, 每条剩下的链从当前赋值起交给 walksat.solve_formula
+依次继续 (见 benchmark/batch_benchmark.py).
+
+所有链共用一个随机数发生器, 因此结果与单链 walksat.py 的同一种子不同, 但每条链的翻转次数分布是有效的.
+"""
+
+import time
+
+import numpy as np
+from bitarray import bitarray
+
+# 活跃链少于这么多条时交给标量求解器: 一核上 3600 个顶点的 grid, 每步约 50-90 微秒, 标量每次翻转约 5.5 微秒
+HANDOFF_CHAINS = 16
+
+
+class BatchFormula:
+    """
+    批量求解用的稠密数组形式:
+    - clause_vars / clause_pos: m x Lmax, 每个子句的变量 (从0开始) 与文字是否为正, 不足 Lmax 的部分由 mask 标记
+    - occ_clause: n x O, 每个变量出现的子句 (填充为哑子句 m)
+    - occ_delta: 2n x O, 第 2v+b 行为变量 v 翻转为 b 时对应子句为真文字个数的变化, 即 ±净系数 (填充为 0)
+    """
+    def __init__(self, formula):
+        self.formula = formula
+        literals = np.asarray(formula.literals, dtype=np.int64)
+        offsets = np.asarray(formula.offsets, dtype=np.int64)
+        self.num_clauses = m = len(offsets) - 1
+        # 与 walksat.py 一致: 只为实际出现的变量赋值
+        self.num_variables = n = formula.max_variable
+        self.lengths = np.diff(offsets)
+        self.has_empty_clause = bool(m) and bool((self.lengths == 0).any())
+
+        width = int(self.lengths.max()) if m else 0
+        clause_ids = np.repeat(np.arange(m, dtype=np.int64), self.lengths)
+        column = np.arange(len(literals), dtype=np.int64) - offsets[clause_ids]
+        variables = np.abs(literals) - 1
+        self.clause_vars = np.zeros((m, width), dtype=np.int64)
+        self.clause_pos = np.zeros((m, width), dtype=bool)
+        self.mask = np.zeros((m, width), dtype=bool)
+        self.clause_vars[clause_ids, column] = variables
+        self.clause_pos[clause_ids, column] = literals > 0
+        self.mask[clause_ids, column] = True
+
+        keys, inverse = np.unique(variables * max(m, 1) + clause_ids, return_inverse=True)
+        net = np.bincount(inverse, weights=np.where(literals > 0, 1, -1)).astype(np.int64)
+        keep = net != 0
+        keys, net = keys[keep], net[keep]
+        occ_var = keys // max(m, 1)
+        occ_cls = keys % max(m, 1)
+        counts = np.bincount(occ_var, minlength=n)
+        width = int(counts.max()) if len(counts) else 0
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        column = np.arange(len(keys)) - starts[occ_var]
+        self.occ_clause = np.full((n, width), m, dtype=np.int64)
+        self.occ_delta = np.zeros((2 * n, width), dtype=np.int64)
+        self.occ_clause[occ_var, column] = occ_cls
+        self.occ_delta[2 * occ_var, column] = -net
+        self.occ_delta[2 * occ_var + 1, column] = net
+
+    def true_counts(self, assignment):
+        """
+        assignment 为 K x n 布尔矩阵; 返回 K x (m+1) 的为真文字个数, 哑子句一列恒为 1.
+        """
+        counts = np.ones((len(assignment), self.num_clauses + 1), dtype=np.int64)
+        for k, row in enumerate(assignment):
+            values = row[self.clause_vars] == self.clause_pos
+            counts[k, :-1] = (values & self.mask).sum(axis=1)
+        return counts
+
+
+def to_bitarray(row):
+    """布尔向量 -> 与 walksat.random_assignment 相同布局的 bitarray."""
+    bits = bitarray(endian='little')
+    bits.frombytes(np.packbits(row, bitorder='little').tobytes())
+    del bits[len(row):]
+    return bits
+
+
+def solve_batch(formula, num_chains, max_flips=1000000, timeout=36000, seed=None, handoff=HANDOFF_CHAINS):
+    """
+    同步运行 num_chains 条随机游走链. 每条链在找到解或达到 max_flips 时停止, 全部停止或超时后返回
+    每条链的结果字典列表 {chain, solved, flips, time}; time 为该链停止时的总耗时 (各链共用同一个核).
+    活跃链少于 handoff 条时, 剩下的链依次交给标量求解器继续; handoff=0 时始终同步推进.
+    """
+    batch = formula if isinstance(formula, BatchFormula) else BatchFormula(formula)
+    rng = np.random.default_rng(seed)
+    m = batch.num_clauses
+    width = m + 1
+
+    assignment = rng.random((num_chains, batch.num_variables)) < 0.5
+    true_count = batch.true_counts(assignment)
+    count_flat = true_count.reshape(-1)
+    # 每条链的未满足子句列表 (前 unsat_count[k] 项有效) 与每个子句在列表中的位置
+    unsat_chain, unsat_clause = np.nonzero(true_count[:, :-1] == 0)
+    unsat_count = np.bincount(unsat_chain, minlength=num_chains)
+    rank = np.arange(len(unsat_chain)) - (np.cumsum(unsat_count) - unsat_count)[unsat_chain]
+    unsat_flat = np.zeros(num_chains * max(m, 1), dtype=np.int64)
+    unsat_flat[unsat_chain * m + rank] = unsat_clause
+    where_flat = np.zeros(num_chains * width, dtype=np.int64)
+    where_flat[unsat_chain * width + unsat_clause] = rank
+    flips = np.zeros(num_chains, dtype=np.int64)
+    finish_time = np.zeros(num_chains)
+
+    start_time = time.time()
+    active = np.flatnonzero(unsat_count > 0)
+    if batch.has_empty_clause:
+        # 含空子句的公式不可满足, 也无法从空子句中选文字
+        active = active[:0]
+    list_base, count_base = active * m, active * width
+    step = 0
+    timed_out = False
+    while len(active) >= max(handoff, 1) and step < max_flips:
+        if step % 64 == 0 and time.time() - start_time > timeout:
+            timed_out = True
+            break
+        step += 1
+
+        # 均匀选一个未满足子句: 对每条链的列表取一个随机下标
+        draws = rng.random((2, len(active)))
+        count = unsat_count[active]
+        clause = unsat_flat[list_base + (draws[0] * count).astype(np.int64)]
+        column = (draws[1] * batch.lengths[clause]).astype(np.int64)
+        var = batch.clause_vars[clause, column]
+        value = ~assignment[active, var]
+        assignment[active, var] = value
+
+        rows = batch.occ_clause[var]
+        flat = count_base[:, None] + rows
+        before = count_flat[flat]
+        after = before + batch.occ_delta[2 * var + value]
+        # 每个变量的出现子句已去重, 只有哑子句一列会重复, 而它的变化为 0
+        count_flat[flat] = after
+        hit_chain, hit_slot = np.nonzero((after == 0) != (before == 0))
+        if not len(hit_chain):
+            continue
+        hit_clause = rows[hit_chain, hit_slot]
+        added = after[hit_chain, hit_slot] == 0
+
+        # 先删除: 每条链删去 r 项后, 落在新长度之内的空位由列表末尾 r 项中仍未满足的子句填补.
+        # np.nonzero 按链排序, 因此空位与填补项按链一一对应
+        rem_chain = hit_chain[~added]
+        if len(rem_chain):
+            rem_clause = hit_clause[~added]
+            count = count - np.bincount(rem_chain, minlength=len(active))
+            rank = np.arange(len(rem_chain)) - np.searchsorted(rem_chain, rem_chain)
+            tail = unsat_flat[list_base[rem_chain] + count[rem_chain] + rank]
+            filler = count_flat[count_base[rem_chain] + tail] == 0
+            holes = where_flat[count_base[rem_chain] + rem_clause]
+            hole = holes < count[rem_chain]
+            unsat_flat[list_base[rem_chain[hole]] + holes[hole]] = tail[filler]
+            where_flat[count_base[rem_chain[filler]] + tail[filler]] = holes[hole]
+        # 再把新变为未满足的子句追加到列表末尾
+        add_chain = hit_chain[added]
+        if len(add_chain):
+            add_clause = hit_clause[added]
+            position = count[add_chain] + np.arange(len(add_chain)) - np.searchsorted(add_chain, add_chain)
+            unsat_flat[list_base[add_chain] + position] = add_clause
+            where_flat[count_base[add_chain] + add_clause] = position
+            count = count + np.bincount(add_chain, minlength=len(active))
+        unsat_count[active] = count
+
+        done = count == 0
+        if done.any():
+            finished = active[done]
+            flips[finished] = step
+            finish_time[finished] = time.time() - start_time
+            active = active[~done]
+            list_base, count_base = active * m, active * width
+
+    if len(active) and step < max_flips and not timed_out:
+        from walksat import solve_formula
+        for k in active:
+            elapsed = time.time() - start_time
+            solution, flip_count = solve_formula(batch.formula, max_flips=max_flips - step,
+                                                 timeout=max(timeout - elapsed, 0),
+                                                 seed=int(rng.integers(1 << 63)), name=f"chain {k}",
+                                                 assignment=to_bitarray(assignment[k]))
+            if solution is not None:
+                unsat_count[k] = 0
+            flips[k] = step + flip_count
+            finish_time[k] = time.time() - start_time
+    else:
+        elapsed = time.time() - start_time
+        flips[active] = step
+        finish_time[active] = elapsed
+    return [
+        {
+            "chain": k,
+            "solved": bool(unsat_count[k] == 0),
+            "flips": int(flips[k]),
+            "time": float(finish_time[k]),
+        }
+        for k in range(num_chains)
+    ]
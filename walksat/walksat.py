@@ -1,84 +1,381 @@
 import os
+import sys
 import time
 from bitarray import bitarray
 import random
 import argparse
+from array import array
 
-# 读取DIMACS文件
-def read_dimacs(filename):
-    clauses = []
-    variable_to_clauses = {}
-    with open(filename, 'r') as file:
-        for line in file:
-            if line.startswith('c') or line.startswith('p'):
-                continue
-            clause = [int(x) for x in line.strip().split()[:-1]]
-            clauses.append(clause)
-            for literal in clause:
-                var = abs(literal)
-                if var not in variable_to_clauses:
-                    variable_to_clauses[var] = set()
-                variable_to_clauses[var].add(len(clauses) - 1)
-    return clauses, variable_to_clauses
-
-# 随机赋值，使用位向量存储赋值
-def random_assignment(clauses, num_variables):
-    assignment = bitarray(num_variables)
-    assignment.setall(False)
-    for i in range(num_variables):
-        assignment[i] = random.choice([True, False])
+try:
+    import numpy as np
+except ImportError:  # NumPy 可选, 没有时初始化退回逐文字求值
+    np = None
+
+# 添加对共享模块 (common/) 的引用路径
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from checkpoint import Checkpointer
+from cnfcache import load_formula
+from dimacs import CNFFormula
+from portfolio import run_portfolio, summarize
+from profiling import Profiler, write_report
+from results import append_records, make_record
+from xorsat import run_preprocessing
+
+# 读取DIMACS文件, 返回紧凑存储的 CNFFormula (见 common/dimacs.py)
+# use_cache 时优先使用同目录下的二进制缓存 (见 common/cnfcache.py), 没有则解析后写入
+def read_dimacs(filename, use_cache=True):
+    return load_formula(filename, use_cache=use_cache)
+
+# 随机赋值，使用位向量存储赋值: 一次取 num_variables 个随机位 (random.getrandbits), 按字节整块写入位向量
+def random_assignment(formula, num_variables):
+    bits = random.getrandbits(num_variables) if num_variables else 0
+    assignment = bitarray(endian='little')
+    assignment.frombytes(bits.to_bytes((num_variables + 7) // 8, 'little'))
+    del assignment[num_variables:]
     return assignment
 
-# 评估子句是否被满足
-def evaluate_clause(clause, assignment):
-    for literal in clause:
-        if (literal > 0 and assignment[abs(literal) - 1]) or (literal < 0 and not assignment[abs(literal) - 1]):
-            return True
-    return False
-
-# 获取未满足的子句
-def get_unsatisfied_clauses(clauses, assignment):
-    unsatisfied_clauses = set()
-    for idx, clause in enumerate(clauses):
-        if not evaluate_clause(clause, assignment):
-            unsatisfied_clauses.add(idx)
-    return unsatisfied_clauses
+class ClauseBlocks:
+    """
+    按宽度分组的子句块, 用于整块求值 (需要 NumPy):
+    同一宽度 w 的 k 个子句存为 k x w 的变量矩阵与符号矩阵, 赋值展开为布尔数组后,
+    一次取下标与比较即得到整块子句的每个文字真假, 按行求和即为每个子句的为真文字个数.
+    Tseitin 公式中每个顶点的子句宽度等于其度数, 因此块数很少.
+    """
+    def __init__(self, formula):
+        literals = np.asarray(formula.literals, dtype=np.int64)
+        offsets = np.asarray(formula.offsets, dtype=np.int64)
+        self.num_clauses = len(offsets) - 1
+        lengths = np.diff(offsets)
+        self.blocks = []
+        for width in np.unique(lengths):
+            ids = np.flatnonzero(lengths == width)
+            lits = literals[offsets[ids][:, None] + np.arange(width)]
+            self.blocks.append((ids, np.abs(lits) - 1, lits > 0))
+
+    def evaluate(self, assignment):
+        """
+        返回 (true_count, true_sum): 每个子句为真的文字个数, 以及为真文字的变量编号 (从0开始) 之和.
+        """
+        values = np.frombuffer(assignment.unpack(), dtype=np.uint8).view(bool)
+        true_count = np.zeros(self.num_clauses, dtype=np.int64)
+        true_sum = np.zeros(self.num_clauses, dtype=np.int64)
+        for ids, variables, positive in self.blocks:
+            truth = values[variables] == positive
+            true_count[ids] = truth.sum(axis=1)
+            true_sum[ids] = (variables * truth).sum(axis=1)
+        return true_count, true_sum
 
 # 翻转一个字面值所对应的变量
-def flip_random_variable(clause, assignment):
+def flip_random_variable(clause, state):
     literal = random.choice(clause)
-    var = abs(literal) - 1
-    assignment[var] = not assignment[var]
+    state.flip(abs(literal) - 1)
+
+class IncrementalState:
+    """
+    增量维护每个子句中为真的文字个数, 以及未满足子句的索引集合.
+    未满足子句存放在列表中, 并记录每个子句在列表中的位置,
+    因此插入/删除/随机选取均为 O(1). 每次翻转只访问含该变量的子句 (由 formula.occurrences() 给出).
+    列表顺序取决于子句变为未满足的先后, 而不是子句编号, 因此同一种子的结果与原先按集合选取时不同.
+    """
+    def __init__(self, formula, assignment):
+        self.formula = formula
+        self.assignment = assignment
+        occ_offsets, self.occ_clauses = formula.occurrences()
+        self.occ_offsets = list(occ_offsets)  # 每个文字一项, 用列表加快下标访问
+
+        num_clauses = len(formula)
+        self.unsatisfied = []
+        self.unsatisfied_pos = [-1] * num_clauses
+        if np is not None:
+            # 整块求值 (见 ClauseBlocks); true_sum 留给 ScoredState 使用
+            true_count, self._true_sum = ClauseBlocks(formula).evaluate(assignment)
+            self.true_count = true_count.tolist()
+            for idx in np.flatnonzero(true_count == 0).tolist():
+                self._add_unsatisfied(idx)
+            return
+        literals = formula.literals
+        offsets = formula.offsets
+        self._true_sum = None
+        self.true_count = [0] * num_clauses
+        for idx in range(num_clauses):
+            count = 0
+            for literal in literals[offsets[idx]:offsets[idx + 1]]:
+                if (literal > 0) == assignment[abs(literal) - 1]:
+                    count += 1
+            self.true_count[idx] = count
+            if count == 0:
+                self._add_unsatisfied(idx)
+
+    def _add_unsatisfied(self, idx):
+        self.unsatisfied_pos[idx] = len(self.unsatisfied)
+        self.unsatisfied.append(idx)
+
+    def _remove_unsatisfied(self, idx):
+        pos = self.unsatisfied_pos[idx]
+        last = self.unsatisfied.pop()
+        if last != idx:
+            self.unsatisfied[pos] = last
+            self.unsatisfied_pos[last] = pos
+        self.unsatisfied_pos[idx] = -1
+
+    def random_unsatisfied_clause(self):
+        return random.choice(self.unsatisfied)
+
+    def snapshot(self):
+        """
+        检查点所需的状态: 赋值与未满足子句列表的顺序 (random.choice 依赖它); 其余计数由赋值重新计算.
+        """
+        return {"assignment": self.assignment, "unsatisfied": self.unsatisfied}
+
+    def restore(self, snapshot):
+        """
+        在由同一赋值构造的状态上恢复 snapshot 中的未满足子句顺序.
+        """
+        self.unsatisfied = list(snapshot["unsatisfied"])
+        for pos, idx in enumerate(self.unsatisfied):
+            self.unsatisfied_pos[idx] = pos
+
+    def flip(self, var):
+        """
+        翻转变量 var (从0开始编号), 只更新包含该变量的子句.
+        先处理变为真的文字, 再处理变为假的文字, 使得同时含 x 与 -x 的子句计数不会短暂归零.
+        """
+        value = not self.assignment[var]
+        self.assignment[var] = value
+        # 文字 +v 的下标为 2v, -v 为 2v+1 (见 dimacs.literal_index)
+        pos_k = 2 * (var + 1)
+        true_k, false_k = (pos_k, pos_k + 1) if value else (pos_k + 1, pos_k)
+        occ_offsets = self.occ_offsets
+        occ_clauses = self.occ_clauses
+        now_true = occ_clauses[occ_offsets[true_k]:occ_offsets[true_k + 1]]
+        now_false = occ_clauses[occ_offsets[false_k]:occ_offsets[false_k + 1]]
+        true_count = self.true_count
+        for idx in now_true:
+            true_count[idx] += 1
+            if true_count[idx] == 1:
+                self._remove_unsatisfied(idx)
+        for idx in now_false:
+            true_count[idx] -= 1
+            if true_count[idx] == 0:
+                self._add_unsatisfied(idx)
+
+class ScoredState(IncrementalState):
+    """
+    在 IncrementalState 的基础上增量维护每个变量的 break / make 计数:
+    - break[v]: 翻转 v 后会变为未满足的子句数, 即 v 是唯一为真文字的子句数
+    - make[v]:  翻转 v 后会变为满足的子句数, 即含 v 的未满足子句数
+    唯一为真文字的变量由 true_sum (子句中为真文字的变量编号之和) 在 true_count == 1 时直接得到.
+    要求子句中没有重复变量 (见 simplify_formula).
+    """
+    def __init__(self, formula, assignment):
+        super().__init__(formula, assignment)
+        num_variables = len(assignment)
+        literals = formula.literals
+        offsets = formula.offsets
+        self.break_count = [0] * num_variables
+        self.make_count = [0] * num_variables
+        self.last_flip = [-1] * num_variables
+        self.step = 0
+        if self._true_sum is not None:
+            # 未满足子句中的每个文字 make 加一, 唯一为真文字的变量 break 加一
+            true_count = np.asarray(self.true_count, dtype=np.int64)
+            lengths = np.diff(np.asarray(offsets, dtype=np.int64))
+            unsat_vars = np.abs(np.asarray(literals, dtype=np.int64)[np.repeat(true_count == 0, lengths)]) - 1
+            self.make_count = np.bincount(unsat_vars, minlength=num_variables).tolist()
+            self.break_count = np.bincount(self._true_sum[true_count == 1], minlength=num_variables).tolist()
+            self.true_sum = self._true_sum.tolist()
+            return
+        self.true_sum = [0] * len(formula)
+        for idx in range(len(formula)):
+            total = 0
+            for literal in literals[offsets[idx]:offsets[idx + 1]]:
+                var = abs(literal) - 1
+                if (literal > 0) == assignment[var]:
+                    total += var
+                elif self.true_count[idx] == 0:
+                    self.make_count[var] += 1
+            self.true_sum[idx] = total
+            if self.true_count[idx] == 1:
+                self.break_count[total] += 1
+
+    def snapshot(self):
+        return dict(super().snapshot(), last_flip=self.last_flip, step=self.step)
+
+    def restore(self, snapshot):
+        super().restore(snapshot)
+        self.last_flip = list(snapshot["last_flip"])
+        self.step = snapshot["step"]
+
+    def flip(self, var):
+        value = not self.assignment[var]
+        self.assignment[var] = value
+        self.last_flip[var] = self.step
+        self.step += 1
+        pos_k = 2 * (var + 1)
+        true_k, false_k = (pos_k, pos_k + 1) if value else (pos_k + 1, pos_k)
+        occ_offsets = self.occ_offsets
+        occ_clauses = self.occ_clauses
+        literals = self.formula.literals
+        offsets = self.formula.offsets
+        true_count = self.true_count
+        true_sum = self.true_sum
+        break_count = self.break_count
+        make_count = self.make_count
+        for idx in occ_clauses[occ_offsets[true_k]:occ_offsets[true_k + 1]]:
+            count = true_count[idx] + 1
+            true_count[idx] = count
+            true_sum[idx] += var
+            if count == 1:
+                self._remove_unsatisfied(idx)
+                for literal in literals[offsets[idx]:offsets[idx + 1]]:
+                    make_count[abs(literal) - 1] -= 1
+                break_count[var] += 1
+            elif count == 2:
+                break_count[true_sum[idx] - var] -= 1
+        for idx in occ_clauses[occ_offsets[false_k]:occ_offsets[false_k + 1]]:
+            count = true_count[idx] - 1
+            true_count[idx] = count
+            true_sum[idx] -= var
+            if count == 0:
+                self._add_unsatisfied(idx)
+                for literal in literals[offsets[idx]:offsets[idx + 1]]:
+                    make_count[abs(literal) - 1] += 1
+                break_count[var] -= 1
+            elif count == 1:
+                break_count[true_sum[idx]] += 1
+
+# 去掉子句中重复的文字以及同时含 x 与 -x 的子句 (恒真), 不改变公式的解; break/make 计数要求这种形式
+def simplify_formula(formula):
+    literals = array('i')
+    offsets = array('q', [0])
+    for clause in formula.clauses():
+        unique = list(dict.fromkeys(clause))
+        if any(-literal in unique for literal in unique):
+            continue
+        literals.extend(unique)
+        offsets.append(len(literals))
+    return CNFFormula(literals, offsets, num_variables=formula.num_variables, max_variable=formula.max_variable)
+
+# WalkSAT/SKC: 有 break 为 0 的变量时直接翻转它 (freebie); 否则以概率 noise 随机翻转, 否则翻转 break 最小的变量
+def pick_skc(clause, state, noise):
+    break_count = state.break_count
+    variables = [abs(literal) - 1 for literal in clause]
+    scores = [break_count[var] for var in variables]
+    best = min(scores)
+    if best > 0 and random.random() < noise:
+        return random.choice(variables)
+    return random.choice([var for var, score in zip(variables, scores) if score == best])
+
+# Novelty+: 以概率 walk_prob 随机翻转; 否则按 Novelty 选择: 按 break - make 排序 (并列时较久未翻转者优先),
+# 最优变量不是子句中最近翻转的变量时选它, 否则以概率 noise 选次优变量
+def pick_novelty_plus(clause, state, noise, walk_prob):
+    variables = [abs(literal) - 1 for literal in clause]
+    if random.random() < walk_prob:
+        return random.choice(variables)
+    break_count = state.break_count
+    make_count = state.make_count
+    last_flip = state.last_flip
+    ranked = sorted(variables, key=lambda var: (break_count[var] - make_count[var], last_flip[var]))
+    best = ranked[0]
+    if len(ranked) == 1 or last_flip[best] != max(last_flip[var] for var in variables):
+        return best
+    return ranked[1] if random.random() < noise else best
+
+HEURISTICS = ("random", "skc", "novelty+")
 
 # 求解CNF公式，设置超时限制和随机种子
-def solve_cnf(filename, max_flips=1000000, timeout=36000, seed=None):
+def solve_cnf(filename, max_flips=1000000, timeout=36000, seed=None, use_cache=True, **options):
+    formula = read_dimacs(filename, use_cache=use_cache)
+    return solve_formula(formula, max_flips=max_flips, timeout=timeout, seed=seed, name=filename, **options)
+
+# 在已解析的公式上求解; should_stop 用于 portfolio 模式下提前终止
+# heuristic: random 为纯随机游走 (默认); skc / novelty+ 使用缓存的 break/make 计数
+# profiler (可选, 见 common/profiling.py): 记录初始化 / 选子句 / 选变量 / 翻转的耗时, 翻转速度与未满足子句数轨迹
+# checkpoint (可选, 见 common/checkpoint.py): 每 1024 次翻转检查一次是否该保存检查点;
+# checkpoint.resumed 不为 None 时从保存的赋值, 翻转数与随机数状态继续, 结果与不中断的运行相同
+# assignment (可选): 初始赋值 (bitarray, 会被原地修改), 代替随机初始赋值; 批量模式把剩下的链交给标量求解器时使用
+def solve_formula(formula, max_flips=1000000, timeout=36000, seed=None, name="", should_stop=None,
+                  heuristic="random", noise=0.5, walk_prob=0.01, profiler=None, checkpoint=None, assignment=None):
+    if heuristic not in HEURISTICS:
+        raise ValueError(f"Unknown heuristic: {heuristic}")
     if seed is not None:
         random.seed(seed)
+    resumed = checkpoint.resumed if checkpoint is not None else None
     
-    clauses, variable_to_clauses = read_dimacs(filename)
-    num_variables = max(abs(literal) for clause in clauses for literal in clause)
-    assignment = random_assignment(clauses, num_variables)
+    init_start = time.perf_counter()
+    # 只为实际出现的变量赋值 (与头部声明无关)
+    num_variables = formula.max_variable
+    if resumed is not None:
+        assignment = resumed["assignment"]
+    elif assignment is None:
+        assignment = random_assignment(formula, num_variables)
     
-    unsatisfied_clauses = get_unsatisfied_clauses(clauses, assignment)
+    if heuristic == "random":
+        state = IncrementalState(formula, assignment)
+    else:
+        formula = simplify_formula(formula)
+        state = ScoredState(formula, assignment)
+    if resumed is not None:
+        state.restore(resumed)
+        random.setstate(resumed["random"])
+    literals = formula.literals
+    offsets = formula.offsets
+
+    skc = pick_skc
+    novelty_plus = pick_novelty_plus
+    sample_interval = 0
+    if profiler is not None:
+        profiler.add_time("init", time.perf_counter() - init_start)
+        profiler.counters["initial_unsat"] = len(state.unsatisfied)
+        state.random_unsatisfied_clause = profiler.timed("select_clause", state.random_unsatisfied_clause)
+        state.flip = profiler.timed("flip", state.flip)
+        skc = profiler.timed("pick_variable", pick_skc)
+        novelty_plus = profiler.timed("pick_variable", pick_novelty_plus)
+        sample_interval = profiler.sample_interval
     
     start_time = time.time()
     flip_count = 0
-    for _ in range(max_flips):
-        if not unsatisfied_clauses:
-            return assignment, flip_count
+    if resumed is not None:
+        start_time -= checkpoint.elapsed_before
+        flip_count = resumed["flips"]
+    solution = None
+    for _ in range(max_flips - flip_count):
+        if not state.unsatisfied:
+            solution = assignment
+            break
+        if sample_interval and flip_count % sample_interval == 0:
+            profiler.record("unsat", [flip_count, len(state.unsatisfied)])
         
         elapsed_time = time.time() - start_time
         if elapsed_time > timeout:
-            print(f"Timeout reached for {filename} after {elapsed_time:.2f} seconds.")
-            return None, flip_count
+            print(f"Timeout reached for {name} after {elapsed_time:.2f} seconds.")
+            break
+        if should_stop is not None and flip_count % 1024 == 0 and should_stop():
+            break
+        if checkpoint is not None and flip_count % 1024 == 0 and checkpoint.due():
+            checkpoint.save(dict(state.snapshot(), flips=flip_count, random=random.getstate()))
         
-        random_clause_idx = random.choice(list(unsatisfied_clauses))
-        random_clause = clauses[random_clause_idx]
-        flip_random_variable(random_clause, assignment)
+        idx = state.random_unsatisfied_clause()
+        random_clause = literals[offsets[idx]:offsets[idx + 1]]
+        if heuristic == "random":
+            flip_random_variable(random_clause, state)
+        elif heuristic == "skc":
+            state.flip(skc(random_clause, state, noise))
+        else:
+            state.flip(novelty_plus(random_clause, state, noise, walk_prob))
         flip_count += 1
-        unsatisfied_clauses = get_unsatisfied_clauses(clauses, assignment)
-    
-    return None, flip_count
+    else:
+        if not state.unsatisfied:
+            solution = assignment
+
+    if profiler is not None:
+        elapsed_time = time.time() - start_time
+        profiler.record("unsat", [flip_count, len(state.unsatisfied)])
+        profiler.counters["flips"] = flip_count
+        profiler.counters["final_unsat"] = len(state.unsatisfied)
+        profiler.counters["min_unsat_sampled"] = min(point[1] for point in profiler.series["unsat"])
+        profiler.counters["flips_per_sec"] = flip_count / elapsed_time if elapsed_time > 0 else 0.0
+    return solution, flip_count
 
 # 将求解结果保存到文件
 def save_result(filename, solution, elapsed_time, flip_count, result_folder, seed):
@@ -93,13 +390,102 @@ def save_result(filename, solution, elapsed_time, flip_count, result_folder, see
         else:
             f.write("No satisfying assignment found.\n")
 
-# 执行单个种子求解并保存结果
-def run_single_seed(filename, result_folder, timeout, seed):
+# 一次运行的 JSONL 结果记录 (见 common/results.py); WalkSAT 无法证明不可满足, 未找到解记为 TIMEOUT
+def walksat_record(filename, seed, solved, flip_count, elapsed_time, options, **fields):
+    return make_record(filename, "walksat", options.get("heuristic", "random"), seed,
+                       "SAT" if solved else "TIMEOUT", elapsed_time, flips=flip_count, **fields)
+
+# 执行单个种子求解并保存结果; options 为 solve_formula 的启发式参数 (heuristic / noise / walk_prob)
+# profile 为 JSON 剖析报告的输出路径 ("-" 为标准输出), None 表示不剖析
+# results_path 为 JSONL 结果文件路径: 给定时追加一条记录, 不再写单独的结果文本文件
+# formula 为已解析 (例如经过 XOR 预处理) 的公式, 为 None 时读取 filename
+# checkpoint 为 Checkpointer (见 common/checkpoint.py): 运行时间包含之前被中断的各段, 正常结束后删除检查点
+def run_single_seed(filename, result_folder, timeout, seed, use_cache=True, profile=None, profile_interval=1000,
+                    results_path=None, formula=None, checkpoint=None, **options):
+    profiler = Profiler(profile_interval) if profile else None
     start_time = time.time()
-    solution, flip_count = solve_cnf(filename, timeout=timeout, seed=seed)
+    if formula is None:
+        solution, flip_count = solve_cnf(filename, timeout=timeout, seed=seed, use_cache=use_cache,
+                                         profiler=profiler, checkpoint=checkpoint, **options)
+    else:
+        solution, flip_count = solve_formula(formula, timeout=timeout, seed=seed, name=filename,
+                                             profiler=profiler, checkpoint=checkpoint, **options)
     elapsed_time = time.time() - start_time
-    save_result(filename, solution, elapsed_time, flip_count, result_folder, seed)
+    if checkpoint is not None:
+        elapsed_time = checkpoint.elapsed()
+        checkpoint.remove()
+    if results_path:
+        append_records(results_path,
+                       [walksat_record(filename, seed, solution is not None, flip_count, elapsed_time, options)])
+    else:
+        save_result(filename, solution, elapsed_time, flip_count, result_folder, seed)
     print(f"Finished processing {filename} with seed {seed} in {elapsed_time:.2f} seconds.")
+    if profiler is not None:
+        write_report(profiler.report(solver="walksat", file=filename, seed=seed, solved=solution is not None,
+                                     **options), profile)
+
+# portfolio worker: data 为 (filename, formula, timeout, options, profile_interval),
+# options 为 solve_formula 的启发式参数; profile_interval 不为 None 时在结果中附带剖析报告
+def solve_seed(data, seed, should_stop):
+    filename, formula, timeout, options, profile_interval = data
+    profiler = Profiler(profile_interval) if profile_interval is not None else None
+    start_time = time.time()
+    solution, flip_count = solve_formula(formula, timeout=timeout, seed=seed,
+                                         name=filename, should_stop=should_stop, profiler=profiler, **options)
+    result = {
+        "seed": seed,
+        "solved": solution is not None,
+        "flips": flip_count,
+        "time": time.time() - start_time,
+    }
+    if profiler is not None:
+        result["profile"] = profiler.report(solver="walksat", file=filename, seed=seed,
+                                            solved=solution is not None, **options)
+    return result
+
+# 解析一次公式, 多个种子并行求解并保存每个已完成种子的结果
+def run_seeds(filename, result_folder, timeout, seeds, workers=None, mode="first", use_cache=True, options=None,
+              profile=None, profile_interval=1000, results_path=None, formula=None):
+    options = options or {}
+    if formula is None:
+        formula = read_dimacs(filename, use_cache=use_cache)
+    results = run_portfolio(solve_seed, (filename, formula, timeout, options,
+                                         profile_interval if profile else None),
+                            seeds, workers=workers, mode=mode)
+    for r in results:
+        if not results_path:
+            save_result(filename, r["solved"], r["time"], r["flips"], result_folder, r["seed"])
+        print(f"Finished processing {filename} with seed {r['seed']} in {r['time']:.2f} seconds.")
+    if results_path:
+        append_records(results_path, [walksat_record(filename, r["seed"], r["solved"], r["flips"], r["time"], options)
+                                      for r in results])
+    if mode == "all":
+        solved = [r for r in results if r["solved"]]
+        print(f"Solved {len(solved)}/{len(results)} seeds.")
+        for key in ("time", "flips"):
+            print(f"{key}: {summarize(solved, key)}")
+    if profile:
+        write_report([r["profile"] for r in sorted(results, key=lambda r: r["seed"])], profile)
+    return results
+
+# 批量模式: 在一个进程中用 NumPy 同步推进 num_chains 条链 (见 batch_walksat.py), 保存每条链的结果
+def run_batch(filename, result_folder, timeout, num_chains, seed=None, use_cache=True, results_path=None, formula=None):
+    from batch_walksat import solve_batch  # 依赖 NumPy, 只在批量模式下导入
+    if formula is None:
+        formula = read_dimacs(filename, use_cache=use_cache)
+    results = solve_batch(formula, num_chains, timeout=timeout, seed=seed)
+    base_seed = seed if seed is not None else "none"
+    if results_path:
+        append_records(results_path, [walksat_record(filename, seed, r["solved"], r["flips"], r["time"], {},
+                                                     chain=r["chain"]) for r in results])
+    else:
+        for r in results:
+            save_result(filename, r["solved"], r["time"], r["flips"], result_folder, f"{base_seed}_chain{r['chain']}")
+    solved = [r for r in results if r["solved"]]
+    print(f"Solved {len(solved)}/{len(results)} chains.")
+    for key in ("time", "flips"):
+        print(f"{key}: {summarize(solved, key)}")
+    return results
 
 # 通过命令行传入参数
 def main():
@@ -108,9 +494,80 @@ def main():
     parser.add_argument("result_folder", help="Folder to save the result.")
     parser.add_argument("--timeout", type=int, default=3600, help="Timeout for solving the CNF file (default: 3600 seconds).")
     parser.add_argument("--seed", type=int, default=None, help="Random seed for the solver (optional).")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always parse the DIMACS text; do not read or write the binary .cnfb cache.")
+    parser.add_argument("--num-seeds", type=int, default=1,
+                        help="Run seeds seed, seed+1, ..., in parallel on one parsed formula (default: 1).")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for --num-seeds (default: CPU count).")
+    parser.add_argument("--portfolio", choices=["first", "all"], default="first",
+                        help="first: stop when any seed solves; all: run every seed for the runtime distribution.")
+    parser.add_argument("--batch", type=int, default=None, metavar="K",
+                        help="Advance K independent chains in lockstep with NumPy in this process (requires numpy).")
+    parser.add_argument("--heuristic", choices=HEURISTICS, default="random",
+                        help="Variable selection: random walk (default), WalkSAT/SKC, or Novelty+.")
+    parser.add_argument("--noise", type=float, default=0.5,
+                        help="Noise probability p for skc and novelty+ (default: 0.5).")
+    parser.add_argument("--walk-prob", type=float, default=0.01,
+                        help="Random-walk probability wp for novelty+ (default: 0.01).")
+    parser.add_argument("--profile", metavar="PATH", default=None,
+                        help="Write per-phase timers, counters and the unsat-count trajectory as JSON to PATH ('-' for stdout).")
+    parser.add_argument("--profile-interval", type=int, default=1000,
+                        help="Record the number of unsatisfied clauses every N flips when profiling (default: 1000).")
+    parser.add_argument("--results", metavar="PATH", default=None,
+                        help="Append one JSON record per run to the JSONL file PATH instead of writing result text files.")
+    parser.add_argument("--xor", action="store_true",
+                        help="Recover XOR constraints and decide or simplify the formula by GF(2) elimination first.")
+    parser.add_argument("--checkpoint", metavar="PATH", default=None,
+                        help="Periodically save the assignment, flip count and RNG state to PATH (single seed only).")
+    parser.add_argument("--checkpoint-interval", type=float, default=300,
+                        help="Seconds between checkpoints (default: 300). SIGTERM also writes one and stops.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue from the --checkpoint file if it exists; the run is identical to an uninterrupted one.")
     args = parser.parse_args()
+    options = dict(heuristic=args.heuristic, noise=args.noise, walk_prob=args.walk_prob)
+
+    if args.batch is not None and args.heuristic != "random":
+        parser.error("--batch only supports --heuristic random")
+    if args.batch is not None and args.profile:
+        parser.error("--profile is not supported with --batch")
+    if args.checkpoint and (args.batch is not None or args.num_seeds > 1):
+        parser.error("--checkpoint only supports a single seed")
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requires --checkpoint")
+    checkpoint = None
+    if args.checkpoint:
+        checkpoint = Checkpointer(args.checkpoint, args.checkpoint_interval,
+                                  meta=dict(solver="walksat", file=args.cnf_file, seed=args.seed, xor=args.xor, **options))
+        if args.resume and checkpoint.load() is not None:
+            print(f"Resuming {args.cnf_file} from {args.checkpoint} at flip {checkpoint.resumed['flips']}.")
+        checkpoint.watch_signals()
+
+    # XOR 预处理: 直接判定时不再运行 WalkSAT (预处理单独记一条 solver="xor" 的结果), 否则在化简后的公式上求解
+    formula = None
+    if args.xor:
+        preprocessed = run_preprocessing(args.cnf_file, read_dimacs(args.cnf_file, use_cache=not args.no_cache),
+                                         results_path=args.results)
+        if preprocessed.status is not None:
+            if not args.results:
+                save_result(args.cnf_file, preprocessed.solution, preprocessed.stats["time"], 0, args.result_folder,
+                            "xor")
+            print(f"Decided {args.cnf_file} by XOR preprocessing: {preprocessed.status}.")
+            return
+        formula = preprocessed.formula
 
-    run_single_seed(args.cnf_file, args.result_folder, timeout=args.timeout, seed=args.seed)
+    if args.batch is not None:
+        run_batch(args.cnf_file, args.result_folder, args.timeout, args.batch, seed=args.seed,
+                  use_cache=not args.no_cache, results_path=args.results, formula=formula)
+    elif args.num_seeds > 1:
+        base_seed = args.seed if args.seed is not None else 0
+        seeds = range(base_seed, base_seed + args.num_seeds)
+        run_seeds(args.cnf_file, args.result_folder, args.timeout, seeds, workers=args.workers, mode=args.portfolio,
+                  use_cache=not args.no_cache, options=options, profile=args.profile,
+                  profile_interval=args.profile_interval, results_path=args.results, formula=formula)
+    else:
+        run_single_seed(args.cnf_file, args.result_folder, timeout=args.timeout, seed=args.seed,
+                        use_cache=not args.no_cache, profile=args.profile, profile_interval=args.profile_interval,
+                        results_path=args.results, formula=formula, checkpoint=checkpoint, **options)
 
 if __name__ == "__main__":
     main()